@@ -0,0 +1,226 @@
+import numpy as np
+import scipy.sparse as sp
+
+from case import bus_index
+
+
+class BatchPowerFlowControl:
+    """
+    Classe para cálculo simultâneo de vários cenários do fluxo de potência com Regulação Primária (método de
+    Newton-Raphson com arrays empilhados: um cenário por linha)
+
+    Os limites de potência reativa dos geradores não são tratados (sem chaveamento PV -> PQ): todas as barras de geração
+    mantêm a tensão especificada. Para cenários com limites de potência reativa utilize PowerFlowControl
+    """
+
+    def __init__(self, dbar, dlin, dger, ybus, delta, est=None, pg_esp=None, v_esp=None, sol=None):
+        """
+        :param delta: variação de carga (em %) de cada cenário -> array (k,) ou (k, nbus)
+        :param est: estatismo (em %) de cada gerador por cenário -> array (k, nger) -> Default: dger['est']
+        :param pg_esp: potência ativa especificada (em MW) de cada gerador por cenário -> Default: dbar['p']
+        :param v_esp: tensão especificada (em p.u.) de cada gerador por cenário -> Default: dbar['tensao']
+        :param sol: solução inicial empilhada (voltage, theta, pg, qg, f) -> Default: dados do arquivo
+        """
+
+        self.dbar = dbar
+        self.dlin = dlin
+        self.dger = dger
+
+        # Matriz Ybus densa compartilhada por todos os cenários
+        self.ybus = ybus.toarray() if sp.issparse(ybus) else np.asarray(ybus)
+
+        # Número de barras, geradores e áreas do sistema
+        self.nbus = self.ybus.shape[0]
+        self.nger = len(self.dger['num'])
+        self.nare = 1
+
+        # Dimensão da Jacobiana
+        self.dim = 2 * self.nbus + 2 * self.nger + self.nare
+
+        # Potência base do sistema (em MVA) e frequências base e especificada
+        self.sbase = 100
+        self.fbase = 60
+        self.fesp = 1
+
+        # Iteration counter e tolerância
+        self.iter_max = 10
+        self.e = 1e-6
+
+        # Barras de geração (índices internos, na ordem do bloco dger) e barra de referência angular (VTheta)
+        tipo = np.asarray(self.dbar['tipo'])
+        self.gbus = bus_index(self.dbar['num'], self.dger['num'])
+        self.slack = np.flatnonzero(tipo == 2)
+
+        # Cenários: variação de carga por barra
+        delta = np.asarray(delta, dtype=float)
+        self.delta = 1 + (delta if delta.ndim == 2 else delta[:, None] * np.ones(self.nbus)) * 1e-2
+        self.k = self.delta.shape[0]
+
+        # Valores especificados por cenário
+        p = np.asarray(self.dbar['p'], dtype=float)
+        self.p_fix = np.where(tipo == 0, p, 0.) / self.sbase
+        self.p_load = np.asarray(self.dbar['p_load'], dtype=float) / self.sbase * self.delta
+        self.q_fix = np.where(tipo == 0, np.asarray(self.dbar['q'], dtype=float), 0.) / self.sbase
+        self.q_load = np.asarray(self.dbar['q_load'], dtype=float) / self.sbase * self.delta
+
+        ones = np.ones((self.k, self.nger))
+        self.est = ones * (np.asarray(self.dger['est'], dtype=float) if est is None else est)
+        self.pg_esp = ones * (p[self.gbus] if pg_esp is None else pg_esp) / self.sbase
+        self.v_esp = ones * (np.asarray(self.dbar['tensao'], dtype=float)[self.gbus] * 1e-3 if v_esp is None else v_esp)
+        self.theta_esp = np.radians(np.asarray(self.dbar['angulo'], dtype=float)[self.slack])
+
+        # Limites de potência ativa e frequências máximas e mínimas de operação de cada gerador
+        self.pg_min = ones * np.asarray(self.dger['pg_min'], dtype=float) / self.sbase
+        self.pg_max = ones * np.asarray(self.dger['pg_max'], dtype=float) / self.sbase
+        self.freq_g = {
+            'max': self.fesp + self.est * 1e-2 * (self.pg_esp - self.pg_min),
+            'min': self.fesp + self.est * 1e-2 * (self.pg_esp - self.pg_max)
+        }
+
+        # Solução inicial empilhada
+        if sol is None:
+            sol = {
+                'voltage': np.asarray(self.dbar['tensao'], dtype=float) * 1e-3,
+                'theta': np.radians(np.asarray(self.dbar['angulo'], dtype=float)),
+                'pg': p[self.gbus] / self.sbase,
+                'qg': np.asarray(self.dbar['q'], dtype=float)[self.gbus] / self.sbase,
+                'f': 1.
+            }
+
+        self.sol = {
+            'voltage': np.ones((self.k, self.nbus)) * sol['voltage'],
+            'theta': np.ones((self.k, self.nbus)) * sol['theta'],
+            'pg': ones * sol['pg'],
+            'qg': ones * sol['qg'],
+            'f': np.ones(self.k) * sol['f'],
+            'iter': np.zeros(self.k, dtype=int),
+            'converged': np.zeros(self.k, dtype=bool)
+        }
+
+        # Elementos constantes da Jacobiana Expandida (apg, bqg, cpg, eqg e ft)
+        self.ipg = 2 * self.nbus
+        self.iqg = self.ipg + self.nger
+        self.ifr = self.iqg + self.nger
+        gen = np.arange(self.nger)
+
+        self.jacob_exp = np.zeros((self.dim, self.dim))
+        self.jacob_exp[self.gbus, self.ipg + gen] = -1.
+        self.jacob_exp[self.nbus + self.gbus, self.iqg + gen] = -1.
+        self.jacob_exp[self.ipg + gen, self.ipg + gen] = 1.
+        self.jacob_exp[self.iqg + gen, self.nbus + self.gbus] = 1.
+        self.jacob_exp[self.ifr, self.slack] = 1.
+
+    def limits(self, idx):
+        """
+        Método para identificação dos geradores com potência ativa no limite
+        :param idx: cenários ativos
+        :return: Máscaras (cenário x gerador) dos geradores nos limites mínimo e máximo
+        """
+
+        f = self.sol['f'][idx, None]
+
+        return f >= self.freq_g['max'][idx], f <= self.freq_g['min'][idx]
+
+    def calc_res(self, idx):
+        """
+        Método para cálculo dos resíduos dos cenários ativos
+        :param idx: cenários ativos
+        :return: Resíduos empilhados (deltaP, deltaQ, deltaY, deltaW, deltaZ)
+        """
+
+        vm = self.sol['voltage'][idx]
+        th = self.sol['theta'][idx]
+        pg = self.sol['pg'][idx]
+        qg = self.sol['qg'][idx]
+
+        v = vm * np.exp(1j * th)
+        s = v * np.conj(v @ self.ybus.T)
+
+        res = np.zeros((idx.size, self.dim))
+
+        # Resíduos DeltaP e DeltaQ
+        res[:, :self.nbus] = self.p_fix - self.p_load[idx] - s.real
+        res[:, self.gbus] += pg
+        res[:, self.nbus:self.ipg] = self.q_fix - self.q_load[idx] - s.imag
+        res[:, self.nbus + self.gbus] += qg
+
+        # Resíduo DeltaY (nulo para geradores no limite de potência ativa)
+        at_min, at_max = self.limits(idx)
+        res[:, self.ipg:self.iqg] = np.where(at_min | at_max, 0., self.pg_esp[idx] - pg - (
+                self.sol['f'][idx, None] - self.fesp) / (self.est[idx] * 1e-2))
+
+        # Resíduos DeltaW e DeltaZ
+        res[:, self.iqg:self.ifr] = self.v_esp[idx] - vm[:, self.gbus]
+        res[:, self.ifr] = np.sum(self.theta_esp - th[:, self.slack], axis=1)
+
+        return res
+
+    def jacobiana(self, idx):
+        """
+        Método para cálculo das matrizes Jacobianas Expandidas dos cenários ativos
+        :param idx: cenários ativos
+        :return: Matrizes Jacobianas empilhadas
+        """
+
+        n = self.nbus
+        vm = self.sol['voltage'][idx]
+        v = vm * np.exp(1j * self.sol['theta'][idx])
+        i = v @ self.ybus.T
+
+        # dS/dTheta e dS/dV
+        yv = self.ybus * v[:, None, :]
+        ds_dth = -1j * v[:, :, None] * np.conj(yv)
+        ds_dv = v[:, :, None] * np.conj(yv) / vm[:, None, :]
+
+        diag = np.arange(n)
+        ds_dth[:, diag, diag] += 1j * v * np.conj(i)
+        ds_dv[:, diag, diag] += np.conj(i) * v / vm
+
+        jacob = np.empty((idx.size, self.dim, self.dim))
+        jacob[:] = self.jacob_exp
+        jacob[:, :n, :n] = ds_dth.real
+        jacob[:, :n, n:2 * n] = ds_dv.real
+        jacob[:, n:2 * n, :n] = ds_dth.imag
+        jacob[:, n:2 * n, n:2 * n] = ds_dv.imag
+
+        # Submatriz cf (nula para geradores no limite de potência ativa)
+        at_min, at_max = self.limits(idx)
+        jacob[:, self.ipg:self.iqg, self.ifr] = np.where(at_min | at_max, 0., 1. / (self.est[idx] * 1e-2))
+
+        return jacob
+
+    def newton_control(self):
+        """
+        Método de Newton-Raphson para todos os cenários (cenários convergidos deixam o conjunto ativo)
+        :return: Solução empilhada com número de iterações e convergência de cada cenário
+        """
+
+        active = np.arange(self.k)
+
+        while active.size:
+            res = self.calc_res(active)
+
+            # Remove cenários convergidos ou que atingiram o número máximo de iterações
+            converged = np.max(np.abs(res), axis=1) <= self.e
+            self.sol['converged'][active] = converged
+            keep = ~converged & (self.sol['iter'][active] <= self.iter_max)
+            active = active[keep]
+            if not active.size:
+                break
+
+            self.sol['iter'][active] += 1
+            dx = np.linalg.solve(self.jacobiana(active), res[keep][:, :, None])[:, :, 0]
+
+            # Atualiza variaveis de estado
+            self.sol['theta'][active] += dx[:, :self.nbus]
+            self.sol['voltage'][active] += dx[:, self.nbus:self.ipg]
+            self.sol['pg'][active] += dx[:, self.ipg:self.iqg]
+            self.sol['qg'][active] += dx[:, self.iqg:self.ifr]
+            self.sol['f'][active] += dx[:, self.ifr]
+
+            # Tratamento de limite de potência ativa
+            at_min, at_max = self.limits(active)
+            self.sol['pg'][active] = np.where(at_min, self.pg_min[active],
+                                              np.where(at_max, self.pg_max[active], self.sol['pg'][active]))
+
+        return self.sol
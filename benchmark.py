@@ -0,0 +1,399 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from linear_solver import SparseLUSolver
+from power_flow_gov import PowerFlowControl
+from read_file import ReadFile
+from synthetic import synthetic_pwf
+from ybus import Ybus
+
+
+def replicate_pwf(file, copies, file_out):
+    """
+    Método para geração de um arquivo de dados extenso por replicação dos blocos DBAR, DLIN e DGER
+    :param file: caminho do arquivo de dados elétricos original
+    :param copies: número de cópias dos blocos (numeração das barras deslocada a cada cópia)
+    :param file_out: caminho do arquivo de saída
+    :return: Número de registros escritos
+    """
+
+    # Campos com numeração de barra em cada bloco: (coluna inicial, coluna final)
+    fields = {
+        'DBAR': ((0, 5),),
+        'DLIN': ((0, 5), (10, 15)),
+        'DGER': ((0, 5),)
+    }
+
+    with open(file, 'r', encoding='latin-1') as f:
+        lines = [line.rstrip('\r\n') for line in f]
+
+    nbus = 0
+    records = {block: list() for block in fields}
+    block = None
+    for line in lines:
+        if block is None and line.strip() in fields:
+            block = line.strip()
+        elif block is not None and line.strip() in ('9999', '99999'):
+            block = None
+        elif block is not None and line[:1] != '(':
+            records[block].append(line)
+            if block == 'DBAR':
+                nbus = max(nbus, int(line[:5]))
+
+    nrec = 0
+    with open(file_out, 'w', encoding='latin-1') as f:
+        for block, spec in fields.items():
+            f.write(f'{block}\n')
+            for copy in range(copies):
+                for line in records[block]:
+                    for start, end in spec:
+                        line = line[:start] + f'{int(line[start:end]) + copy * nbus:>{end - start}}' + line[end:]
+                    f.write(f'{line}\n')
+                    nrec += 1
+            f.write('99999\n')
+        f.write('FIM\n')
+
+    return nrec
+
+
+def bench_read_file(file, copies=1000, repeat=3):
+    """
+    Método para medição da taxa de leitura do arquivo de dados elétricos
+    :param file: caminho do arquivo de dados elétricos original
+    :param copies: número de cópias dos blocos no arquivo de teste
+    :param repeat: número de repetições (considera o menor tempo)
+    :return: Dicionário com tamanho do arquivo, número de registros, tempo e taxa de leitura (MB/s)
+    """
+
+    with tempfile.TemporaryDirectory() as folder:
+        file_out = os.path.join(folder, 'bench.pwf')
+        nrec = replicate_pwf(file, copies, file_out)
+        size = os.path.getsize(file_out) / 2 ** 20
+
+        elapsed = list()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ReadFile().read_file(file_out)
+            elapsed.append(time.perf_counter() - start)
+
+    return {
+        'mb': size,
+        'records': nrec,
+        'seconds': min(elapsed),
+        'mb_s': size / min(elapsed)
+    }
+
+
+def measure(func, repeat=3):
+    """
+    Método para medição do tempo de execução e do pico de memória de uma etapa
+    :param func: função sem argumentos a ser medida
+    :param repeat: número de repetições (considera o menor tempo)
+    :return: Dicionário com tempo (em s) e pico de memória alocada (em MB, medido em execução separada)
+    """
+
+    # Execução inicial (importações sob demanda) não considerada
+    func()
+
+    elapsed = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+
+    # Pico de memória (alocações rastreadas pelo tracemalloc, incluindo arrays numpy)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'seconds': min(elapsed),
+        'peak_mb': peak / 2 ** 20
+    }
+
+
+def bench_case(nbus, repeat=3, seed=0, delta=10.):
+    """
+    Método para medição de cada etapa do fluxo de potência com Regulação Primária em um sistema sintético
+    :param nbus: número de barras do sistema sintético
+    :param repeat: número de repetições de cada etapa
+    :param seed: semente do gerador do sistema sintético
+    :param delta: variação de carga (em %)
+    :return: Dicionário com dimensões do sistema e tempo e memória de cada etapa
+    """
+
+    with tempfile.TemporaryDirectory() as folder:
+        file = os.path.join(folder, f'synthetic_{nbus}.pwf')
+        _, nlin, nger = synthetic_pwf(nbus, file, seed=seed)
+
+        stages = {'read_file': measure(lambda: ReadFile().read_file(file, frames=False), repeat)}
+        dbar, dlin, dger = ReadFile().read_file(file, frames=False)
+
+    stages['calc_ybus'] = measure(lambda: Ybus(dbar, dlin).calc_ybus(), repeat)
+    ybus = Ybus(dbar, dlin).calc_ybus()
+
+    # Jacobiana e sistema linear no ponto inicial
+    pf = PowerFlowControl(dbar, dlin, dger, ybus, delta)
+    pf.freq_ger()
+    pf.value_spec()
+    pf.jacobiana_exp()
+    pf.calc_res()
+    stages['jacobiana'] = measure(pf.jacobiana, repeat)
+
+    def solve():
+        solver = SparseLUSolver()
+        solver.factorize(pf.jacob)
+        solver.solve(pf.res)
+
+    stages['solve'] = measure(solve, repeat)
+
+    def newton():
+        newton.pf = PowerFlowControl(dbar, dlin, dger, ybus, delta)
+        newton.pf.newton_control(imprime=False)
+
+    stages['newton_control'] = measure(newton, repeat)
+
+    # Método desacoplado rápido (XB) com Regulação Primária
+    def decoupled():
+        decoupled.pf = PowerFlowControl(dbar, dlin, dger, ybus, delta)
+        decoupled.pf.decoupled_control('XB', imprime=False)
+
+    stages['decoupled_control'] = measure(decoupled, repeat)
+
+    return {
+        'nbus': nbus,
+        'nlin': nlin,
+        'nger': nger,
+        'iter': newton.pf.iter,
+        'outer': newton.pf.outer,
+        'converged': newton.pf.converged,
+        'iter_fd': decoupled.pf.iter,
+        'method_fd': decoupled.pf.method,
+        'stages': stages
+    }
+
+
+def bench_backend(nbus, repeat=3, seed=0, delta=10.):
+    """
+    Método para comparação dos backends de cálculo dos resíduos e da Jacobiana (numpy e numba) em um sistema sintético
+    :param nbus: número de barras do sistema sintético
+    :param repeat: número de repetições de cada etapa
+    :param seed: semente do gerador do sistema sintético
+    :param delta: variação de carga (em %)
+    :return: Dicionário com tempo e memória de cada etapa por backend e ganho do backend numba (None se indisponível).
+     O ganho de newton_control (inclui a fatoração LU, comum aos backends) é próximo de 1
+    """
+
+    import kernels
+
+    with tempfile.TemporaryDirectory() as folder:
+        file = os.path.join(folder, f'synthetic_{nbus}.pwf')
+        synthetic_pwf(nbus, file, seed=seed)
+        dbar, dlin, dger = ReadFile().read_file(file, frames=False)
+
+    ybus = Ybus(dbar, dlin).calc_ybus()
+    backends = ('numpy', 'numba') if kernels.AVAILABLE else ('numpy',)
+
+    stages = dict()
+    for backend in backends:
+        # Resíduos e Jacobiana no ponto inicial (primeira execução inclui a compilação dos kernels)
+        pf = PowerFlowControl(dbar, dlin, dger, ybus, delta, backend=backend)
+        pf.freq_ger()
+        pf.value_spec()
+        pf.jacobiana_exp()
+
+        def newton():
+            PowerFlowControl(dbar, dlin, dger, ybus, delta, backend=backend).newton_control(imprime=False)
+
+        stages[backend] = {
+            'calc_res': measure(pf.calc_res, repeat),
+            'jacobiana': measure(pf.jacobiana, repeat),
+            'newton_control': measure(newton, repeat)
+        }
+
+    speedup = {stage: stages['numpy'][stage]['seconds'] / max(stages['numba'][stage]['seconds'], 1e-12)
+               for stage in stages['numpy']} if 'numba' in stages else None
+
+    return {'nbus': nbus, 'stages': stages, 'speedup': speedup}
+
+
+def bench_import(modules=('power_flow_gov', 'sweep', 'contingency'), repeat=5):
+    """
+    Método para medição do tempo de importação dos módulos em um processo novo (inicialização dos processos de cálculo)
+    :param modules: módulos importados
+    :param repeat: número de repetições (considera o menor tempo)
+    :return: Dicionário com tempo de importação (em s) e módulos de interface (pandas, plotly) carregados
+    """
+
+    code = ('import sys, time\n'
+            'start = time.perf_counter()\n'
+            f'import {", ".join(modules)}\n'
+            'print(time.perf_counter() - start)\n'
+            'print(" ".join(name for name in ("pandas", "plotly") if name in sys.modules))')
+
+    elapsed = list()
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split('\n')
+        elapsed.append(float(out[0]))
+
+    return {
+        'seconds': min(elapsed),
+        'loaded': out[1].split()
+    }
+
+
+def environment():
+    """
+    Método para identificação do ambiente de execução
+    :return: Dicionário com commit, versões e data da medição
+    """
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        'commit': commit,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'machine': platform.machine()
+    }
+
+
+def run_suite(sizes=(24, 300, 2000, 20000), repeat=3, file_out=None):
+    """
+    Método para execução do conjunto de benchmarks
+    :param sizes: números de barras dos sistemas sintéticos
+    :param repeat: número de repetições de cada etapa
+    :param file_out: caminho do arquivo .json de saída -> Default: não grava
+    :return: Dicionário com ambiente e resultados de cada sistema
+    """
+
+    results = {
+        'environment': environment(),
+        'import': bench_import(),
+        'cases': {str(nbus): bench_case(nbus, repeat) for nbus in sizes}
+    }
+
+    if file_out:
+        with open(file_out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return results
+
+
+def compare(results, baseline, threshold=1.25, min_seconds=1e-3):
+    """
+    Método para comparação de resultados com uma medição de referência
+    :param results: resultados atuais (ver run_suite)
+    :param baseline: resultados de referência
+    :param threshold: razão máxima admitida entre tempos ou picos de memória atual e de referência
+    :param min_seconds: tempo mínimo para comparação (etapas mais rápidas são ignoradas por imprecisão)
+    :return: Lista de regressões (sistema, etapa, métrica, valor de referência, valor atual, razão)
+    """
+
+    regressions = list()
+
+    # Tempo de importação
+    if 'import' in results and 'import' in baseline:
+        ratio = results['import']['seconds'] / max(baseline['import']['seconds'], 1e-12)
+        if ratio > threshold:
+            regressions.append((0, 'import', 'seconds', baseline['import']['seconds'], results['import']['seconds'],
+                                ratio))
+
+    for case, data in results['cases'].items():
+        if case not in baseline['cases']:
+            continue
+
+        for stage, values in data['stages'].items():
+            ref = baseline['cases'][case]['stages'].get(stage)
+            if ref is None:
+                continue
+
+            for metric in ('seconds', 'peak_mb'):
+                if metric == 'seconds' and ref[metric] < min_seconds:
+                    continue
+                ratio = values[metric] / max(ref[metric], 1e-12)
+                if ratio > threshold:
+                    regressions.append((int(case), stage, metric, ref[metric], values[metric], ratio))
+
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark do fluxo de potência com Regulação Primária')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[24, 300, 2000, 20000],
+                        help='números de barras dos sistemas sintéticos')
+    parser.add_argument('--repeat', type=int, default=3, help='número de repetições de cada etapa')
+    parser.add_argument('--out', default=None, help='arquivo .json de saída')
+    parser.add_argument('--baseline', default=None, help='arquivo .json de referência para comparação')
+    parser.add_argument('--threshold', type=float, default=1.25, help='razão máxima admitida em relação à referência')
+    parser.add_argument('--read', action='store_true', help='mede a taxa de leitura do arquivo IEEE 24 barras')
+    parser.add_argument('--backend', action='store_true',
+                        help='compara os backends numpy e numba dos resíduos e da Jacobiana')
+    parser.add_argument('--import-budget', type=float, default=None,
+                        help='verifica apenas o tempo de importação (em s) e a ausência de pandas/plotly')
+    args = parser.parse_args()
+
+    if args.import_budget is not None:
+        bench = bench_import()
+        print(f"Importação: {bench['seconds'] * 1e3:.1f} ms (limite {args.import_budget * 1e3:.1f} ms), "
+              f"módulos de interface carregados: {', '.join(bench['loaded']) or 'nenhum'}")
+        sys.exit(1 if bench['seconds'] > args.import_budget or bench['loaded'] else 0)
+
+    if args.read:
+        bench = bench_read_file(os.path.join('IEEE 24 Barras FREQ.pwf'))
+        print(f"ReadFile.read_file: {bench['records']} registros, {bench['mb']:.1f} MB em {bench['seconds']:.3f} s "
+              f"-> {bench['mb_s']:.1f} MB/s")
+        sys.exit(0)
+
+    if args.backend:
+        print(f"{'BARRAS':>8} {'ETAPA':>15} {'NUMPY (ms)':>12} {'NUMBA (ms)':>12} {'GANHO':>7}")
+        for nbus in args.sizes:
+            bench = bench_backend(nbus, args.repeat)
+            for stage, values in bench['stages']['numpy'].items():
+                if bench['speedup'] is None:
+                    print(f"{nbus:>8} {stage:>15} {values['seconds'] * 1e3:12.3f} {'-':>12} {'-':>7}")
+                    continue
+                print(f"{nbus:>8} {stage:>15} {values['seconds'] * 1e3:12.3f} "
+                      f"{bench['stages']['numba'][stage]['seconds'] * 1e3:12.3f} {bench['speedup'][stage]:6.2f}x")
+        sys.exit(0)
+
+    results = run_suite(args.sizes, args.repeat, args.out)
+
+    print(f"Importação: {results['import']['seconds'] * 1e3:.1f} ms\n")
+    print(f"{'BARRAS':>8} {'ETAPA':>17} {'TEMPO (ms)':>12} {'MEMÓRIA (MB)':>14}")
+    for case, data in results['cases'].items():
+        for stage, values in data['stages'].items():
+            print(f"{case:>8} {stage:>17} {values['seconds'] * 1e3:12.3f} {values['peak_mb']:14.2f}")
+
+    print(f"\n{'BARRAS':>8} {'NEWTON (ms)':>12} {'ITERAÇÕES':>10} {'DESACOPLADO (ms)':>17} {'ITERAÇÕES':>10}  MÉTODO")
+    for case, data in results['cases'].items():
+        print(f"{case:>8} {data['stages']['newton_control']['seconds'] * 1e3:12.3f} {data['iter']:>10} "
+              f"{data['stages']['decoupled_control']['seconds'] * 1e3:17.3f} {data['iter_fd']:>10}  "
+              f"{data['method_fd']}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+        for case, stage, metric, ref, value, ratio in regressions:
+            print(f'REGRESSÃO: {case} barras, {stage}, {metric}: {ref:.4g} -> {value:.4g} ({ratio:.2f}x)')
+
+        sys.exit(1 if regressions else 0)
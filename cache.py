@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import scipy.sparse as sp
+
+import case
+import read_file
+import ybus
+from case import Block
+from read_file import ReadFile
+from ybus import Ybus
+
+
+def code_version():
+    """
+    Método para cálculo da versão do código que gera o caso compilado
+    :return: Hash dos módulos de leitura do arquivo, do caso compacto e de cálculo da matriz Ybus
+    """
+
+    h = hashlib.sha256()
+    for module in (read_file, case, ybus):
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())
+
+    return h.hexdigest()
+
+
+class CaseCache:
+    """
+    Classe para armazenamento em disco dos casos compilados (blocos dbar, dlin e dger e matriz Ybus)
+
+    Cada caso é armazenado em um diretório com um arquivo .npy por array (carregado com memory-map), identificado pelo
+    hash do conteúdo do arquivo de dados elétricos e da versão do código. Os casos menos usados recentemente são
+    removidos quando o tamanho total ultrapassa max_bytes
+    """
+
+    def __init__(self, folder='.pwf_cache', max_bytes=512 * 2 ** 20):
+        self.folder = folder
+        self.max_bytes = max_bytes
+
+        # Versão do código
+        self.version = code_version()
+
+        # Estatísticas de acesso
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, file):
+        """
+        Método para cálculo da chave do caso
+        :param file: caminho do arquivo de dados elétricos
+        :return: Hash do conteúdo do arquivo e da versão do código
+        """
+
+        h = hashlib.sha256(self.version.encode())
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(2 ** 20), b''):
+                h.update(chunk)
+
+        return h.hexdigest()[:32]
+
+    def load(self, file, frames=True):
+        """
+        Método para carregamento do caso compilado (leitura e compilação do arquivo caso não esteja armazenado)
+        :param file: caminho do arquivo de dados elétricos
+        :param frames: Recebe True (DataFrames) ou False (blocos compactos, sem importar o pandas) -> Default: True
+        :return: Blocos dbar, dlin e dger e matriz Ybus esparsa
+        """
+
+        path = os.path.join(self.folder, self.key(file))
+
+        if os.path.isdir(path):
+            self.hits += 1
+            os.utime(os.path.join(path, 'meta.json'))
+        else:
+            self.misses += 1
+            self.store(file, path)
+            self.evict()
+
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+
+        # Memory-map em modo copy-on-write: alterações em memória não são gravadas no arquivo
+        def array(name):
+            return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='c')
+
+        # Campos de texto armazenados em bytes: decodificados somente quando acessados
+        blocks = [Block({name: array(f'{block}.{name}') for name in meta[block]},
+                        {name: array(f'{block}.{name}') for name in meta['text'][block]})
+                  for block in ('dbar', 'dlin', 'dger')]
+        if frames:
+            blocks = [block.to_frame() for block in blocks]
+
+        ybus = sp.csr_matrix((array('ybus.data'), array('ybus.indices'), array('ybus.indptr')),
+                             shape=tuple(meta['ybus']))
+
+        return blocks[0], blocks[1], blocks[2], ybus
+
+    def store(self, file, path):
+        """
+        Método para leitura, compilação e armazenamento do caso
+        :param file: caminho do arquivo de dados elétricos
+        :param path: diretório do caso
+        :return: Caso armazenado em path
+        """
+
+        dbar, dlin, dger = ReadFile().read_file(file, frames=False)
+        ybus = Ybus(dbar=dbar, dlin=dlin).calc_ybus()
+
+        # Grava em diretório temporário e renomeia (acesso simultâneo de outros processos)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        os.makedirs(tmp, exist_ok=True)
+
+        meta = {'file': os.path.basename(file), 'ybus': list(ybus.shape), 'text': dict()}
+        for block, data in (('dbar', dbar), ('dlin', dlin), ('dger', dger)):
+            meta[block] = list(data)
+            meta['text'][block] = list(data.text)
+            for name in data:
+                np.save(os.path.join(tmp, f'{block}.{name}.npy'), data.raw(name))
+
+        np.save(os.path.join(tmp, 'ybus.data.npy'), ybus.data)
+        np.save(os.path.join(tmp, 'ybus.indices.npy'), ybus.indices)
+        np.save(os.path.join(tmp, 'ybus.indptr.npy'), ybus.indptr)
+
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # Caso já armazenado por outro processo
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def evict(self):
+        """
+        Método para remoção dos casos menos usados recentemente
+        :return: Tamanho total do armazenamento limitado a max_bytes
+        """
+
+        entries = list()
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            meta = os.path.join(path, 'meta.json')
+            if name.endswith('.tmp') or not os.path.isfile(meta):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path))
+            entries.append((os.path.getmtime(meta), size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries)[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,153 @@
+import numpy as np
+
+
+def bus_index(num, query):
+    """
+    Método para conversão de números de barras em índices internos (posição da barra no bloco dbar)
+
+    Os índices internos são contíguos (0 a nbus - 1) independentemente da numeração das barras, de modo que os arrays
+    do caso são dimensionados pelo número de barras e não pelo maior número de barra
+    :param num: números das barras do bloco dbar
+    :param query: números das barras a converter
+    :return: Array com o índice interno de cada barra
+    """
+
+    num = np.asarray(num, dtype=np.int64)
+    query = np.asarray(query, dtype=np.int64)
+    if num.size == 0:
+        if query.size:
+            raise ValueError(f'Barras inexistentes no bloco DBAR: {np.unique(query)[:10].tolist()}')
+        return np.zeros(query.shape, dtype=np.int64)
+
+    order = np.argsort(num, kind='stable')
+    pos = np.minimum(np.searchsorted(num, query, sorter=order), num.size - 1)
+    idx = order[pos]
+
+    missing = num[idx] != query
+    if np.any(missing):
+        raise ValueError(f'Barras inexistentes no bloco DBAR: {np.unique(query[missing])[:10].tolist()}')
+
+    return idx
+
+
+def decode_text(raw):
+    """
+    Método para decodificação de um campo de texto de largura fixa
+    :param raw: array de bytes (um valor por registro)
+    :return: Array de textos (sem espaços nas extremidades)
+    """
+
+    # Campos de texto possuem poucos valores distintos: decodifica apenas os valores únicos
+    values, inverse = np.unique(raw, return_inverse=True)
+
+    return np.array([value.decode('latin-1').strip() for value in values], dtype=object)[inverse]
+
+
+def select(block, rows):
+    """
+    Método para seleção de registros de um bloco
+    :param block: Block ou DataFrame do bloco
+    :param rows: índices ou máscara booleana dos registros
+    :return: Bloco (do mesmo tipo) com os registros selecionados
+    """
+
+    if hasattr(block, 'iloc'):
+        return block.iloc[np.asarray(rows)].reset_index(drop=True)
+
+    return block[np.asarray(rows)]
+
+
+class Block:
+    """
+    Classe para armazenamento compacto de um bloco de dados elétricos (dbar, dlin ou dger)
+
+    Os campos numéricos são arrays tipados (um por campo). Os campos de texto (nome, agregadores, ...) são mantidos como
+    arrays de bytes de largura fixa e decodificados somente quando acessados. O acesso por nome de campo retorna o array
+    do campo, como em um DataFrame; o acesso por índices ou máscara booleana retorna um novo bloco com os registros
+    selecionados
+    """
+
+    def __init__(self, data, text=None):
+        """
+        :param data: dicionário {campo: array} dos campos numéricos (ou já decodificados)
+        :param text: dicionário {campo: array de bytes} dos campos de texto não decodificados
+        """
+
+        self.text = dict() if text is None else dict(text)
+        self.data = {name: np.asarray(values) for name, values in data.items() if name not in self.text}
+
+        # Ordem dos campos
+        self.names = list(data) + [name for name in self.text if name not in data]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key in self.text:
+                self.data[key] = decode_text(self.text.pop(key))
+            return self.data[key]
+
+        return Block({name: self.data[name][key] if name in self.data else None for name in self.names},
+                     {name: values[key] for name, values in self.text.items()})
+
+    def __setitem__(self, name, values):
+        self.text.pop(name, None)
+        self.data[name] = np.asarray(values)
+        if name not in self.names:
+            self.names.append(name)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        values = self.raw(self.names[0]) if self.names else ()
+
+        return len(values)
+
+    @property
+    def shape(self):
+        return len(self), len(self.names)
+
+    def keys(self):
+        return list(self.names)
+
+    def items(self):
+        return [(name, self[name]) for name in self.names]
+
+    def raw(self, name):
+        """
+        Método para acesso a um campo sem decodificação
+        :param name: nome do campo
+        :return: Array do campo (array de bytes, se o campo de texto ainda não foi decodificado)
+        """
+
+        return self.text[name] if name in self.text else self.data[name]
+
+    def copy(self):
+        """
+        Método para cópia do bloco
+        :return: Block com cópias dos arrays
+        """
+
+        return Block({name: np.copy(self.raw(name)) for name in self.names},
+                     {name: np.copy(values) for name, values in self.text.items()})
+
+    def to_frame(self):
+        """
+        Método para conversão do bloco em DataFrame (decodifica todos os campos de texto)
+        :return: DataFrame do bloco
+        """
+
+        # Importação sob demanda: o bloco compacto não depende do pandas
+        import pandas as pd
+
+        return pd.DataFrame(data={name: self[name] for name in self.names})
+
+    def nbytes(self):
+        """
+        Método para cálculo da memória ocupada pelos arrays do bloco
+        :return: Número de bytes
+        """
+
+        return sum(self.raw(name).nbytes for name in self.names)
@@ -0,0 +1,292 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from case import select
+from linear_solver import SparseLUSolver
+from power_flow_gov import PowerFlowControl
+from island import IslandPowerFlow, islands
+from ybus import MutableYbus
+
+# Estado compartilhado pelos processos (ver Contingency.setup)
+_contingency = None
+
+
+def _init(dbar, dlin, dger, ybus, delta, sol, q_state, vlim):
+    """
+    Método de inicialização dos processos: prepara o caso base uma única vez por processo
+    """
+
+    global _contingency
+    _contingency = Contingency(dbar, dlin, dger, ybus, delta, vlim=vlim)
+    _contingency.setup(sol, q_state)
+
+
+def _solve_chunk(branches):
+    """
+    Método para análise de um bloco de contingências
+    :param branches: índices dos ramos (linhas do bloco dlin) a serem desligados
+    :return: Lista de resultados de cada contingência
+    """
+
+    return [_contingency.solve(branch) for branch in branches]
+
+
+class Contingency:
+    """
+    Classe para análise de contingências simples (N-1) de ramos com Regulação Primária
+
+    Cada contingência parte da solução do caso base. A saída do ramo é representada por uma modificação de posto 2 da
+    Ybus (aplicada e revertida nos elementos do ramo) e de posto 4 da Jacobiana Expandida (linhas P e Q das barras
+    terminais), resolvida com a fatoração do caso base pela fórmula de Sherman-Morrison-Woodbury. Contingências que
+    separam o sistema em ilhas elétricas são resolvidas por ilha, com frequência própria. Contingências em que algum
+    gerador muda de estado em relação aos limites de potência reativa prosseguem pelo método de Newton completo
+    """
+
+    def __init__(self, dbar, dlin, dger, ybus, delta, workers=None, vlim=(0.95, 1.05)):
+        self.dbar = dbar
+        self.dlin = dlin
+        self.dger = dger
+        self.ybus = ybus
+        self.delta = delta
+
+        # Número de processos (1 -> análise no próprio processo)
+        self.workers = os.cpu_count() if workers is None else workers
+
+        # Limites de tensão (em p.u.) para identificação de violações
+        self.vlim = vlim
+
+        # Razão máxima entre resíduos consecutivos nas iterações com a Jacobiana do caso base
+        self.stall_ratio = 0.25
+
+    def base(self):
+        """
+        Método para solução do caso base
+        :return: Solução do caso base e estado dos geradores em relação aos limites de potência reativa
+        """
+
+        pf = PowerFlowControl(self.dbar, self.dlin, self.dger, self.ybus, self.delta)
+        pf.newton_control(imprime=False)
+        if not pf.converged:
+            raise RuntimeError('Caso base não convergiu')
+
+        return pf.sol, pf.q_state
+
+    def setup(self, sol, q_state=None):
+        """
+        Método para preparação do caso base: fatoração da Jacobiana e Ybus alterável (ver ybus.MutableYbus)
+        :param sol: solução do caso base
+        :param q_state: estado dos geradores em relação aos limites de potência reativa no caso base (estado inicial das
+         contingências, atualizado na solução de cada contingência) -> Default: todos os geradores com controle de
+         tensão
+        :return: Caso base preparado
+        """
+
+        self.sol = {key: np.copy(value) for key, value in sol.items()}
+        self.q_state = np.zeros(len(self.dger['num']), dtype=int) if q_state is None else np.copy(q_state)
+
+        # Ybus alterável: desligamento e religação de cada ramo por atualização local dos elementos
+        self.ymut = MutableYbus(self.dbar, self.dlin)
+        self.de, self.para = self.ymut.de, self.ymut.para
+
+        self.pf = PowerFlowControl(self.dbar, self.dlin, self.dger, self.ymut, self.delta, sol=self.sol)
+        self.pf.freq_ger()
+        self.pf.value_spec()
+        self.pf.jacobiana_exp()
+        self.reset()
+
+        # Jacobiana e fatoração do caso base
+        self.pf.jacobiana()
+        self.jacob = self.pf.jacob.copy()
+        self.solver = SparseLUSolver()
+        self.solver.factorize(self.jacob)
+
+    def reset(self):
+        """
+        Método para restauração da solução do caso base
+        :return: Solução inicial da contingência
+        """
+
+        self.pf.sol = {key: np.copy(value) for key, value in self.sol.items()}
+        self.pf.sol['f'] = float(self.sol['f'])
+        self.pf.q_state = self.q_state.copy()
+        self.pf.q_switches = np.zeros(self.pf.nger, dtype=int)
+        self.pf.iter = 0
+        self.pf.pg_limits()
+        self.pf.limit_events = list()
+        self.pf.calc_res()
+
+    def solve(self, branch):
+        """
+        Método para análise da contingência de um ramo
+        :param branch: índice do ramo (linha do bloco dlin)
+        :return: Dicionário com resultados da contingência
+        """
+
+        pf = self.pf
+        n = pf.nbus
+        k, m = self.de[branch], self.para[branch]
+
+        # Separação em ilhas elétricas: cada ilha é resolvida com frequência própria
+        dlin = select(self.dlin, np.arange(len(self.dlin['de'])) != branch)
+        if islands(self.dbar, dlin)[0] > 1:
+            return self.solve_islands(branch, dlin)
+
+        method = 'woodbury'
+        nfact = 0
+        it = 0
+
+        # Modificação de posto 2 da Ybus: remove os elementos do ramo
+        mark = self.ymut.checkpoint()
+        self.ymut.switch(branch, False)
+
+        try:
+            self.reset()
+
+            # Modificação de posto 4 da Jacobiana (linhas P e Q das barras terminais) no ponto do caso base
+            rows = np.array([k, m, n + k, n + m])
+            pf.jacobiana()
+            w = (pf.jacob[rows] - self.jacob[rows]).toarray()
+
+            u = np.zeros((pf.dim, rows.size))
+            u[rows, np.arange(rows.size)] = 1.
+            z = np.column_stack([self.solver.solve(u[:, idx]) for idx in range(rows.size)])
+            c = np.eye(rows.size) + w @ z
+
+            res_max = np.max(np.abs(pf.res))
+
+            while res_max > pf.e and it <= pf.iter_max:
+                it += 1
+
+                if method == 'woodbury':
+                    y = self.solver.solve(pf.res)
+                    pf.state_variables = y - z @ np.linalg.solve(c, w @ y)
+                else:
+                    pf.jacobiana()
+                    pf.solver.factorize(pf.jacob)
+                    nfact += 1
+                    pf.state_variables = pf.solver.solve(pf.res)
+
+                pf.update_state_variables()
+                pf.calc_res()
+
+                # Convergência lenta com a Jacobiana do caso base: passa para o método de Newton completo
+                res_new = np.max(np.abs(pf.res))
+                if method == 'woodbury' and not res_new <= self.stall_ratio * res_max:
+                    method = 'newton'
+                res_max = res_new
+
+            converged = bool(res_max <= pf.e)
+
+            # Conjunto ativo de limites de potência reativa na solução da contingência: caso algum gerador mude de
+            # estado, a solução prossegue pelo método de Newton completo (iterações externas de chaveamento PV -> PQ)
+            if converged and pf.q_limits():
+                method = 'newton'
+                nfact -= pf.solver.nfact
+                pf.iter = it
+                pf.newton_control(imprime=False)
+                nfact += pf.solver.nfact
+                it = pf.iter
+                converged = pf.converged
+
+        except (np.linalg.LinAlgError, RuntimeError, ValueError):
+            converged = False
+            method = 'singular'
+
+        finally:
+            # Reverte a modificação da Ybus
+            self.ymut.revert(mark)
+
+        # Carregamento dos ramos em relação à capacidade de emergência (ramo desligado sem fluxo)
+        loading = pf.flow()['loading_emerg'] if converged else np.zeros(len(self.dlin['de']))
+        loading[branch] = 0.
+
+        return self.summary(branch, converged, method, it, nfact, pf.sol['f'] * pf.fbase, pf.sol['voltage'], loading)
+
+    def solve_islands(self, branch, dlin):
+        """
+        Método para análise de uma contingência que separa o sistema em ilhas elétricas
+        :param branch: índice do ramo (linha do bloco dlin)
+        :param dlin: DataFrame (ou Block) do bloco dlin sem o ramo desligado
+        :return: Dicionário com resultados da contingência (frequência da maior ilha)
+        """
+
+        ip = IslandPowerFlow(self.dbar, dlin, self.dger, self.delta, workers=1)
+        table = ip.run()
+
+        # Ilhas sem geração não são resolvidas (carga desligada)
+        solved = table['nger'] > 0
+        main = int(table['nbus'].idxmax())
+
+        loading = np.insert(np.nan_to_num(ip.power_flow['loading_emerg']), branch, 0.)
+        result = self.summary(branch, bool(np.all(table['converged'][solved])), 'islands', int(table['iter'].max()),
+                              int(table['iter'].sum()), table['f'][main], ip.sol['voltage'], loading)
+        result['n_islands'] = ip.nare
+        result['p_shed'] = float(np.sum(table['p_load'][~solved]))
+
+        return result
+
+    def summary(self, branch, converged, method, it, nfact, f, voltage, loading):
+        """
+        Método para montagem dos resultados de uma contingência
+        :param branch: índice do ramo (linha do bloco dlin)
+        :param converged: convergência da solução
+        :param method: método de solução ('woodbury', 'newton', 'singular' ou 'islands')
+        :param it: número de iterações
+        :param nfact: número de fatorações
+        :param f: frequência (em Hz)
+        :param voltage: tensões nas barras (NaN nas barras sem geração na ilha)
+        :param loading: carregamento (em %) de cada ramo em relação à capacidade de emergência
+        :return: Dicionário com resultados da contingência
+        """
+
+        viol = (voltage < self.vlim[0]) | (voltage > self.vlim[1])
+        over = np.flatnonzero(loading > 100.)
+
+        return {
+            'branch': branch,
+            'de': int(self.dlin['de'][branch]),
+            'para': int(self.dlin['para'][branch]),
+            'circ': int(self.dlin['circ'][branch]),
+            'converged': converged,
+            'method': method,
+            'iter': it,
+            'nfact': nfact,
+            'f': f if converged else np.nan,
+            'v_min': np.nanmin(voltage) if converged else np.nan,
+            'v_max': np.nanmax(voltage) if converged else np.nan,
+            'n_viol': int(np.sum(viol)) if converged else -1,
+            'bus_viol': ' '.join(str(num) for num in np.asarray(self.dbar['num'])[viol]) if converged else '',
+            'loading_max': np.max(loading) if converged else np.nan,
+            'n_overload': over.size if converged else -1,
+            'branch_overload': ' '.join(f"{self.dlin['de'][idx]}-{self.dlin['para'][idx]}({self.dlin['circ'][idx]})"
+                                        for idx in over) if converged else '',
+            'n_islands': 1,
+            'p_shed': 0.
+        }
+
+    def run(self, branches=None):
+        """
+        Método para análise das contingências
+        :param branches: índices dos ramos a serem desligados -> Default: todos os ramos do bloco dlin
+        :return: DataFrame com frequência, tensões, carregamentos, violações e convergência de cada contingência
+        """
+
+        import pandas as pd
+
+        branches = np.arange(len(self.dlin['de'])) if branches is None else np.asarray(branches)
+        sol, q_state = self.base()
+
+        if self.workers == 1:
+            _init(self.dbar, self.dlin, self.dger, self.ybus, self.delta, sol, q_state, self.vlim)
+            results = _solve_chunk(branches)
+        else:
+            chunks = [chunk for chunk in np.array_split(branches, max(1, min(self.workers, branches.size)))
+                      if chunk.size]
+            with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init,
+                                     initargs=(self.dbar, self.dlin, self.dger, self.ybus, self.delta, sol, q_state,
+                                               self.vlim)) as pool:
+                results = [result for chunk in pool.map(_solve_chunk, chunks) for result in chunk]
+
+        return pd.DataFrame(results)
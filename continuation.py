@@ -0,0 +1,316 @@
+import numpy as np
+import scipy.sparse as sp
+
+from linear_solver import SparseLUSolver
+from power_flow_gov import PowerFlowControl
+
+
+class ContinuationPowerFlow:
+    """
+    Classe para cálculo do fluxo de potência continuado com Regulação Primária (preditor tangente e corretor com
+    parametrização local) até o ponto de máximo carregamento
+
+    Os limites de potência reativa são tratados no corretor (chaveamento PV -> PQ, ver PowerFlowControl.q_limits). O
+    passo em que algum gerador atinge o limite é reduzido até o ponto de mudança do conjunto ativo, onde o chaveamento
+    é realizado
+    """
+
+    def __init__(self, dbar, dlin, dger, ybus, delta=0., step=0.05, step_min=1e-4, step_max=0.5, max_steps=200):
+        self.dbar = dbar
+        self.dger = dger
+
+        # Caso base (fator de carregamento inicial lambda = 1 + delta * 1e-2)
+        self.pf = PowerFlowControl(dbar, dlin, dger, ybus, delta, solver=SparseLUSolver())
+
+        # Passo do preditor (adaptativo) e número máximo de passos
+        self.step = step
+        self.step_min = step_min
+        self.step_max = step_max
+        self.max_steps = max_steps
+
+        # Número máximo de iterações do corretor
+        self.iter_max = 8
+
+        # Eventos de limite de potência ativa e reativa dos geradores, ponto de máximo carregamento e número de
+        # fatorações
+        self.events = list()
+        self.nose = None
+        self.nfact = 0
+
+        # Potências reativas da solução corrigida antes da primeira mudança do conjunto ativo de limites de potência
+        # reativa (ver breakpoint)
+        self.q_cross = None
+
+    def state(self):
+        """
+        Método para montagem do vetor de estado aumentado
+        :return: Vetor (theta, voltage, pg, qg, f, lambda)
+        """
+
+        return np.concatenate((self.pf.sol['theta'], self.pf.sol['voltage'], self.pf.sol['pg'], self.pf.sol['qg'],
+                               [self.pf.sol['f'], self.pf.delta]))
+
+    def set_state(self, z, q_state=None):
+        """
+        Método para atribuição do vetor de estado aumentado à solução
+        :param z: vetor (theta, voltage, pg, qg, f, lambda)
+        :param q_state: estado dos geradores em relação aos limites de potência reativa -> Default: estado atual
+        :return: Solução atualizada (com o conjunto ativo de limites de potência ativa correspondente)
+        """
+
+        n = self.pf.nbus
+        g = self.pf.nger
+
+        self.pf.sol['theta'] = z[:n].copy()
+        self.pf.sol['voltage'] = z[n:2 * n].copy()
+        self.pf.sol['pg'] = z[2 * n:2 * n + g].copy()
+        self.pf.sol['qg'] = z[2 * n + g:2 * n + 2 * g].copy()
+        self.pf.sol['f'] = z[-2]
+        self.pf.delta = z[-1]
+        if q_state is not None:
+            self.pf.q_state = q_state.copy()
+        self.pf.pg_limits()
+
+    def augmented(self, k):
+        """
+        Método para cálculo da Jacobiana Expandida aumentada pela coluna do fator de carregamento e pela equação de
+        parametrização
+        :param k: índice da variável de continuação no vetor de estado aumentado
+        :return: Matriz aumentada fatorada
+        """
+
+        self.pf.jacobiana()
+
+        row = sp.csr_matrix(([1.], ([0], [k])), shape=(1, self.pf.dim + 1))
+        self.aug = sp.vstack((sp.hstack((self.pf.jacob, self.b)), row), format='csr')
+        self.aug.sort_indices()
+
+        self.pf.solver.factorize(self.aug)
+        self.nfact += 1
+
+    def residual(self, k, target):
+        """
+        Método para cálculo dos resíduos do sistema aumentado
+        :param k: índice da variável de continuação
+        :param target: valor especificado da variável de continuação
+        :return: Resíduos (deltaP, deltaQ, deltaY, deltaW, deltaZ, parametrização)
+        """
+
+        self.pf.value_spec()
+        self.pf.calc_res()
+
+        return np.concatenate((self.pf.res, [target - self.state()[k]]))
+
+    def corrector(self, k, target):
+        """
+        Método corretor (Newton-Raphson no sistema aumentado) com iterações externas de atualização do conjunto ativo de
+        limites de potência reativa
+        :param k: índice da variável de continuação
+        :param target: valor especificado da variável de continuação
+        :return: Número de iterações (None se não convergiu)
+        """
+
+        self.q_cross = None
+        total = 0
+
+        while True:
+            for it in range(self.iter_max + 1):
+                res = self.residual(k, target)
+                if np.max(np.abs(res)) <= self.pf.e:
+                    break
+
+                if not np.all(np.isfinite(res)) or it == self.iter_max:
+                    return None
+
+                self.augmented(k)
+                dz = self.pf.solver.solve(res)
+
+                # Atualiza variaveis de estado (com tratamento de limite de potência ativa) e fator de carregamento
+                self.pf.state_variables = dz[:-1]
+                self.pf.update_state_variables()
+                self.pf.delta += dz[-1]
+
+            total += it
+
+            # Solução corrigida: atualiza o conjunto ativo de limites de potência reativa e, caso algum gerador mude de
+            # estado, inicia nova iteração externa (número de mudanças limitado por PowerFlowControl.q_switch_max)
+            qg = self.pf.sol['qg'].copy()
+            if not self.pf.q_limits():
+                return total
+            if self.q_cross is None:
+                self.q_cross = qg
+
+    def breakpoint(self, z, q_state):
+        """
+        Método para cálculo da fração do passo até o ponto de mudança do conjunto ativo de limites de potência reativa
+        (interpolação linear da potência reativa dos geradores que atingiram o limite entre o ponto anterior e a
+        solução corrigida)
+        :param z: vetor de estado aumentado do ponto anterior
+        :param q_state: estado dos geradores em relação aos limites de potência reativa no ponto anterior
+        :return: Fração do passo (None se nenhum gerador atingiu o limite)
+        """
+
+        pf = self.pf
+        hit = (q_state == 0) & (pf.q_state != 0)
+        if self.q_cross is None or not np.any(hit):
+            return None
+
+        n, g = pf.nbus, pf.nger
+        q0 = z[2 * n + g:2 * n + 2 * g][hit]
+        q1 = self.q_cross[hit]
+        lim = np.where(pf.q_state[hit] > 0, pf.case['q_max'][hit], pf.case['q_min'][hit])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frac = np.clip((lim - q0) / (q1 - q0), 0., 1.)
+
+        return float(np.min(np.nan_to_num(frac, nan=1.)))
+
+    def tangent(self, k, orient):
+        """
+        Método preditor: vetor tangente à curva com a última fatoração da matriz aumentada
+        :param k: índice da variável de continuação
+        :param orient: vetor tangente anterior (sentido de percurso da curva)
+        :return: Vetor tangente normalizado
+        """
+
+        rhs = np.zeros(self.pf.dim + 1)
+        rhs[-1] = 1.
+        t = self.pf.solver.solve(rhs)
+        t /= np.linalg.norm(t)
+
+        return t if np.dot(t, orient) >= 0 else -t
+
+    def limits(self):
+        """
+        Método para identificação dos geradores com potência ativa no limite
+        :return: Array com -1 (limite mínimo), 1 (limite máximo) ou 0 para cada gerador
+        """
+
+        return self.pf.limit_state.copy()
+
+    def run(self, stop_at_nose=True):
+        """
+        Método do fluxo de potência continuado
+        :param stop_at_nose: Recebe True (encerra após o ponto de máximo carregamento) ou False -> Default: True
+        :return: DataFrame com fator de carregamento, frequência, menor tensão e potência ativa gerada em cada ponto
+        """
+
+        import pandas as pd
+
+        pf = self.pf
+        pf.newton_control(imprime=False)
+        if not pf.converged:
+            raise RuntimeError('Caso base não convergiu')
+
+        # Derivada dos resíduos em relação ao fator de carregamento (coluna da matriz aumentada)
+        load = np.concatenate((np.asarray(self.dbar['p_load'], dtype=float),
+                               np.asarray(self.dbar['q_load'], dtype=float),
+                               np.zeros(2 * pf.nger + pf.nare))) / pf.sbase
+        self.b = sp.csr_matrix(load[:, None])
+
+        # Parametrização inicial pelo fator de carregamento
+        k = pf.dim
+        orient = np.zeros(pf.dim + 1)
+        orient[-1] = 1.
+        self.augmented(k)
+
+        num = np.asarray(self.dbar['num'], dtype=int)
+        names = [f'theta_{bus}' for bus in num] + [f'voltage_{bus}' for bus in num] + \
+                [f'pg_{num}' for num in self.dger['num']] + [f'qg_{num}' for num in self.dger['num']] + ['f', 'lambda']
+
+        curve = list()
+        sat = self.limits()
+        q_sat = pf.q_state.copy()
+        step = self.step
+
+        def record(it):
+            curve.append({
+                'lambda': pf.delta,
+                'deltaLoad': (pf.delta - 1) * 1e2,
+                'f': pf.sol['f'] * pf.fbase,
+                'v_min': np.min(pf.sol['voltage']),
+                'bus_v_min': int(num[np.argmin(pf.sol['voltage'])]),
+                'param': names[k],
+                'step': step,
+                'iter': it,
+                **{f'pg_{num}': pf.sol['pg'][idx] * pf.sbase for idx, num in enumerate(self.dger['num'])}
+            })
+
+        record(pf.iter)
+
+        for _ in range(self.max_steps):
+            t = self.tangent(k, orient)
+
+            # Ponto de máximo carregamento: derivada do fator de carregamento muda de sinal
+            if t[-1] < 0 <= orient[-1] and self.nose is None:
+                self.nose = dict(curve[-1])
+                if stop_at_nose:
+                    break
+
+            # Parametrização local próximo ao ponto de máximo carregamento: tensão com maior variação ao longo da
+            # tangente quando esta supera a variação do fator de carregamento
+            dv = np.abs(t[pf.nbus:2 * pf.nbus])
+            if k != pf.dim or np.max(dv) > abs(t[-1]):
+                k = pf.nbus + int(np.argmax(dv))
+            orient = t
+
+            z = self.state()
+            q_state = pf.q_state.copy()
+            q_switches = pf.q_switches.copy()
+
+            while True:
+                pred = z + step * t
+                self.set_state(pred, q_state)
+                it = self.corrector(k, pred[k])
+                if it is not None:
+                    # Gerador atingiu o limite de potência reativa: reduz o passo até o ponto de mudança do conjunto
+                    # ativo (o chaveamento é realizado na solução corrigida próxima a esse ponto)
+                    frac = self.breakpoint(z, q_state)
+                    if frac is None or frac > 0.9 or frac * step < self.step_min:
+                        break
+                    step *= frac
+                else:
+                    # Corretor não convergiu: reduz o passo e repete a partir do último ponto convergido
+                    step *= 0.5
+
+                pf.q_switches[:] = q_switches
+                self.set_state(z, q_state)
+                if step < self.step_min:
+                    break
+
+            if step < self.step_min:
+                self.set_state(z, q_state)
+                if self.nose is None:
+                    self.nose = dict(curve[-1])
+                break
+
+            # Passo adaptativo de acordo com o número de iterações do corretor
+            if it <= 2:
+                step = min(step * 1.5, self.step_max)
+            elif it >= 5:
+                step *= 0.7
+
+            # Eventos de limite de potência ativa (saturação de geradores) e de potência reativa (chaveamento PV -> PQ)
+            new = self.limits()
+            for state, previous, labels in ((new, sat, ('pg_min', 'free', 'pg_max')),
+                                            (pf.q_state, q_sat, ('qg_min', 'pv', 'qg_max'))):
+                for idx in np.flatnonzero(state != previous):
+                    self.events.append({
+                        'lambda': pf.delta,
+                        'f': pf.sol['f'] * pf.fbase,
+                        'num': int(self.dger['num'][idx]),
+                        'limit': labels[int(state[idx]) + 1]
+                    })
+            sat = new
+            q_sat = pf.q_state.copy()
+
+            record(it)
+
+            if not stop_at_nose and self.nose is not None and pf.delta <= curve[0]['lambda']:
+                break
+
+            # Fatoração no ponto convergido para o próximo preditor (caso o corretor não tenha iterado)
+            if it == 0:
+                self.augmented(k)
+
+        return pd.DataFrame(curve)
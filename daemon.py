@@ -0,0 +1,555 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+
+from cache import CaseCache
+from case import bus_index, select
+from island import islands
+from power_flow_gov import PowerFlowControl
+from read_file import ReadFile
+from ybus import MutableYbus
+
+
+class ResidentCase:
+    """
+    Classe para um caso mantido em memória pelo servidor (blocos, Ybus alterável e fluxo de potência compilado)
+
+    A estrutura da Jacobiana Expandida e a ordenação da fatoração são mantidas entre as requisições e cada solução parte
+    da última solução convergida. Alterações de pontos de operação e desligamentos de ramos valem somente para a
+    requisição (revertidos ao final)
+    """
+
+    def __init__(self, name, dbar, dlin, dger, **kwargs):
+        """
+        :param name: nome do caso
+        :param dbar: Block (ou DataFrame) do bloco dbar
+        :param dlin: Block (ou DataFrame) do bloco dlin
+        :param dger: Block (ou DataFrame) do bloco dger
+        :param kwargs: argumentos adicionais de PowerFlowControl (solver, dishonest, backend)
+        """
+
+        self.name = name
+        self.dbar = dbar
+        self.dlin = dlin
+        self.dger = dger
+
+        # Números das barras e ramos (barras de e para e circuito) de cada linha dos blocos
+        self.num = np.asarray(dbar['num'], dtype=int)
+        self.branches = np.column_stack((np.asarray(dlin['de'], dtype=int), np.asarray(dlin['para'], dtype=int),
+                                         np.asarray(dlin['circ'], dtype=int)))
+
+        # Ybus alterável compartilhada com o fluxo de potência (desligamentos aplicados e revertidos nos elementos dos
+        # ramos)
+        self.ymut = MutableYbus(dbar, dlin)
+        self.pf = PowerFlowControl(dbar, dlin, dger, self.ymut, 0., **kwargs)
+
+        # Pontos de operação do caso base (potência ativa e tensão especificadas)
+        self.base = {'p': self.pf.case['p'].copy(), 'tensao': self.pf.case['tensao'].copy()}
+
+        # Última solução convergida e conjunto ativo de limites de potência reativa (partida das requisições)
+        self.sol = {key: np.copy(value) for key, value in self.pf.sol.items()}
+        self.q_state = self.pf.q_state.copy()
+
+        # Requisições do caso atendidas em série (objeto PowerFlowControl compartilhado)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+        self.solve()
+
+    def info(self):
+        """
+        Método para consulta das dimensões e da numeração do caso
+        :return: Dicionário com nome, número de barras, ramos e geradores e números das barras de geração
+        """
+
+        return {
+            'case': self.name,
+            'nbus': self.pf.nbus,
+            'nlin': len(self.branches),
+            'nger': self.pf.nger,
+            'gen': [int(num) for num in self.dger['num']],
+            'requests': self.requests
+        }
+
+    def generator(self, num):
+        """
+        Método para localização da barra de um gerador
+        :param num: número da barra de geração
+        :return: Índice interno da barra
+        """
+
+        bus = int(bus_index(self.num, [int(num)])[0])
+        if bus not in self.pf.gen_bus:
+            raise ValueError(f'Barra {num} sem geração')
+
+        return bus
+
+    def branch(self, item):
+        """
+        Método para localização de um ramo
+        :param item: linha do bloco dlin ou lista [de, para] ou [de, para, circuito]
+        :return: Linha do bloco dlin
+        """
+
+        if isinstance(item, int):
+            if not 0 <= item < len(self.branches):
+                raise ValueError(f'Ramo {item} inexistente')
+            return item
+
+        key = [int(value) for value in item]
+        rows = np.flatnonzero(np.all(self.branches[:, :len(key)] == key, axis=1))
+        if rows.size != 1:
+            raise ValueError(f'Ramo {key} inexistente' if rows.size == 0 else f'Ramo {key} ambíguo: informe o circuito')
+
+        return int(rows[0])
+
+    def solve(self, delta=0., pg=None, v=None, outages=(), full=False):
+        """
+        Método para solução do fluxo de potência com Regulação Primária do caso
+        :param delta: variação de carga (em %)
+        :param pg: dicionário {barra: potência ativa especificada (em MW)} dos geradores alterados
+        :param v: dicionário {barra: tensão especificada (em p.u.)} das barras de geração alteradas
+        :param outages: ramos desligados (ver branch)
+        :param full: Recebe True (inclui tensões, ângulos e carregamentos de todas as barras e ramos) ou False
+        :return: Dicionário com convergência, iterações, frequência, despacho, tensões extremas e carregamento máximo
+        """
+
+        rows = [self.branch(item) for item in outages]
+        if rows:
+            # Desligamentos que separam o sistema em ilhas elétricas não são atendidos (frequência de cada ilha)
+            keep = np.ones(len(self.branches), dtype=bool)
+            keep[rows] = False
+            if islands(self.dbar, select(self.dlin, keep))[0] > 1:
+                raise ValueError('Desligamento separa o sistema em ilhas elétricas')
+
+        with self.lock:
+            pf = self.pf
+            mark = self.ymut.checkpoint()
+
+            try:
+                for num, value in (pg or dict()).items():
+                    pf.case['p'][self.generator(num)] = float(value) / pf.sbase
+                for num, value in (v or dict()).items():
+                    pf.case['tensao'][self.generator(num)] = float(value)
+                for row in rows:
+                    self.ymut.switch(row, False)
+
+                # Partida a quente: última solução convergida
+                pf.sol = {key: np.copy(value) for key, value in self.sol.items()}
+                pf.sol['f'] = float(self.sol['f'])
+                pf.q_state = self.q_state.copy()
+                pf.delta = 1 + float(delta) * 1e-2
+                pf.iter = 0
+                pf.history = list()
+                pf.limit_events = list()
+                pf.q_switches = np.zeros(pf.nger, dtype=int)
+
+                try:
+                    pf.newton_control(imprime=False)
+                except RuntimeError:
+                    # Jacobiana singular
+                    pf.converged = False
+
+                # Carregamento dos ramos calculado com os ramos desligados
+                loading = pf.flow()['loading']
+
+            finally:
+                self.ymut.revert(mark)
+                pf.case['p'][:] = self.base['p']
+                pf.case['tensao'][:] = self.base['tensao']
+
+            if pf.converged:
+                for key in ('voltage', 'theta', 'pg', 'qg'):
+                    self.sol[key][:] = pf.sol[key]
+                self.sol['f'] = pf.sol['f']
+                self.q_state[:] = pf.q_state
+
+            self.requests += 1
+
+            result = {
+                'converged': bool(pf.converged),
+                'iter': pf.iter,
+                'outer': pf.outer,
+                'f': float(pf.sol['f'] * pf.fbase),
+                'pg': (pf.sol['pg'] * pf.sbase).tolist(),
+                'qg': (pf.sol['qg'] * pf.sbase).tolist(),
+                'v_min': float(np.min(pf.sol['voltage'])),
+                'v_max': float(np.max(pf.sol['voltage'])),
+                'loading_max': float(np.max(loading)),
+                'limit_events': pf.limit_events
+            }
+
+            if full:
+                result.update(voltage=pf.sol['voltage'].tolist(), theta=np.degrees(pf.sol['theta']).tolist(),
+                              loading=loading.tolist())
+
+        return result
+
+
+class SolverDaemon:
+    """
+    Classe do servidor de fluxo de potência com Regulação Primária: casos nomeados mantidos em memória e requisições em
+    formato JSON lines atendidas por um conjunto de threads
+
+    Cada requisição é uma linha {"id": ..., "op": ..., <parâmetros>} e cada resposta uma linha {"id": ..., "ok": ...,
+    "result" ou "error": ..., "latency_ms": ...}. As requisições ping, cases e solve são atendidas simultaneamente e
+    suas respostas podem sair fora da ordem (identificadas pelo id); load, unload, stats e shutdown aguardam as
+    requisições anteriores da conexão e são concluídas antes da leitura das seguintes. Operações: load (case, file),
+    unload (case), cases, solve (case, delta, pg, v, outages, full), stats, ping e shutdown
+    """
+
+    def __init__(self, workers=None, cache=None, window=10000, **kwargs):
+        """
+        :param workers: número de threads de atendimento -> Default: número de processadores
+        :param cache: diretório do armazenamento dos casos compilados (ver cache.CaseCache) -> Default: leitura do
+         arquivo a cada carregamento
+        :param window: número de requisições recentes consideradas nas métricas de latência de cada operação
+        :param kwargs: argumentos adicionais de PowerFlowControl (solver, dishonest, backend)
+        """
+
+        self.workers = os.cpu_count() if workers is None else workers
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.cache = CaseCache(cache) if cache is not None else None
+        self.kwargs = kwargs
+
+        # Casos em memória
+        self.cases = dict()
+        self.lock = threading.Lock()
+
+        # Latências recentes (em s) e contadores de requisições e erros de cada operação
+        self.window = window
+        self.latency = dict()
+        self.count = dict()
+        self.errors = dict()
+        self.started = time.time()
+
+        # Servidor do socket Unix (ver serve_unix) e estado do servidor
+        self.server = None
+        self.running = True
+
+        # Operações atendidas em ordem na thread de leitura de cada conexão (ver dispatch)
+        self.serial = ('load', 'unload', 'stats', 'shutdown')
+
+        self.ops = {
+            'load': self.load,
+            'unload': self.unload,
+            'cases': self.list_cases,
+            'solve': self.solve,
+            'stats': self.stats,
+            'ping': lambda: 'pong',
+            'shutdown': self.shutdown
+        }
+
+    def case(self, name):
+        """
+        Método para consulta de um caso em memória
+        :param name: nome do caso
+        :return: Objeto ResidentCase
+        """
+
+        try:
+            return self.cases[name]
+        except KeyError:
+            raise ValueError(f'Caso {name!r} não carregado') from None
+
+    def load(self, case, file):
+        """
+        Método para carregamento (ou recarregamento) de um caso
+        :param case: nome do caso
+        :param file: caminho do arquivo de dados elétricos
+        :return: Dimensões e numeração do caso (ver ResidentCase.info)
+        """
+
+        if self.cache is not None:
+            dbar, dlin, dger, _ = self.cache.load(file, frames=False)
+        else:
+            dbar, dlin, dger = ReadFile().read_file(file, frames=False)
+
+        resident = ResidentCase(case, dbar, dlin, dger, **self.kwargs)
+        with self.lock:
+            self.cases[case] = resident
+
+        return resident.info()
+
+    def unload(self, case):
+        """
+        Método para remoção de um caso
+        :param case: nome do caso
+        :return: Nome do caso removido
+        """
+
+        with self.lock:
+            self.case(case)
+            del self.cases[case]
+
+        return case
+
+    def list_cases(self):
+        """
+        Método para consulta dos casos em memória
+        :return: Lista com dimensões e numeração de cada caso
+        """
+
+        return [resident.info() for resident in list(self.cases.values())]
+
+    def solve(self, case, **params):
+        """
+        Método para solução do fluxo de potência de um caso
+        :param case: nome do caso
+        :param params: parâmetros da solução (ver ResidentCase.solve)
+        :return: Resultados da solução
+        """
+
+        return self.case(case).solve(**params)
+
+    def stats(self):
+        """
+        Método para consulta das métricas de latência
+        :return: Dicionário com tempo de execução do servidor e, para cada operação, número de requisições e de erros e
+         latências (em ms) média, mediana, percentis 95 e 99 e máxima das requisições recentes
+        """
+
+        # Cópia das métricas sob o mesmo lock das atualizações (requisições atendidas simultaneamente)
+        with self.lock:
+            snapshot = [(op, np.array(values), self.count[op], self.errors.get(op, 0))
+                        for op, values in self.latency.items()]
+
+        ops = dict()
+        for op, values, count, errors in snapshot:
+            values = values * 1e3
+            ops[op] = {
+                'count': count,
+                'errors': errors,
+                'mean_ms': float(np.mean(values)),
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)),
+                'p99_ms': float(np.percentile(values, 99)),
+                'max_ms': float(np.max(values))
+            }
+
+        return {'uptime': time.time() - self.started, 'workers': self.workers, 'cases': len(self.cases), 'ops': ops}
+
+    def shutdown(self):
+        """
+        Método para encerramento do servidor (requisições em andamento são concluídas)
+        :return: Servidor encerrado
+        """
+
+        self.running = False
+        if self.server is not None:
+            # serve_forever deve ser interrompido por outra thread
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+        return 'bye'
+
+    def process(self, request, received):
+        """
+        Método para atendimento de uma requisição
+        :param request: dicionário da requisição
+        :param received: instante de recebimento (time.perf_counter)
+        :return: Linha JSON da resposta
+        """
+
+        op = request.get('op')
+        params = {key: value for key, value in request.items() if key not in ('id', 'op')}
+        start = time.perf_counter()
+
+        try:
+            if op not in self.ops:
+                raise ValueError(f'Operação {op!r} inválida')
+            response = {'id': request.get('id'), 'ok': True, 'result': self.ops[op](**params)}
+        except Exception as error:
+            # Erros da requisição são devolvidos ao cliente: o servidor permanece ativo
+            response = {'id': request.get('id'), 'ok': False, 'error': f'{type(error).__name__}: {error}'}
+
+        end = time.perf_counter()
+        response['latency_ms'] = (end - received) * 1e3
+        response['service_ms'] = (end - start) * 1e3
+
+        with self.lock:
+            if op not in self.latency:
+                self.latency[op] = deque(maxlen=self.window)
+                self.count[op] = 0
+            self.latency[op].append(end - received)
+            self.count[op] += 1
+            if not response['ok']:
+                self.errors[op] = self.errors.get(op, 0) + 1
+
+        return json.dumps(response, separators=(',', ':'))
+
+    def dispatch(self, line, write, pending):
+        """
+        Método para encaminhamento de uma linha recebida ao conjunto de threads
+        :param line: linha da requisição (texto ou bytes)
+        :param write: função de envio de uma linha de resposta
+        :param pending: lista das requisições da mesma conexão em andamento (atualizada)
+        :return: Future da requisição (None se atendida imediatamente)
+        """
+
+        received = time.perf_counter()
+
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('Requisição deve ser um objeto JSON')
+        except ValueError as error:
+            write(json.dumps({'id': None, 'ok': False, 'error': f'{type(error).__name__}: {error}'}))
+            return None
+
+        # Operações que alteram os casos em memória ou o estado do servidor atendidas na própria thread de leitura após
+        # a conclusão das requisições anteriores da conexão (as requisições seguintes são lidas somente depois)
+        if request.get('op') in self.serial:
+            wait(pending)
+            pending.clear()
+            write(self.process(request, received))
+            return None
+
+        future = self.pool.submit(lambda: write(self.process(request, received)))
+        pending[:] = [item for item in pending if not item.done()]
+        pending.append(future)
+
+        return future
+
+    def serve_stdio(self, stdin=None, stdout=None):
+        """
+        Método para atendimento das requisições recebidas pela entrada padrão (respostas na saída padrão)
+        :param stdin: arquivo de entrada -> Default: sys.stdin
+        :param stdout: arquivo de saída -> Default: sys.stdout
+        :return: Requisições atendidas até o fim da entrada ou a operação shutdown
+        """
+
+        stdin = sys.stdin if stdin is None else stdin
+        stdout = sys.stdout if stdout is None else stdout
+        lock = threading.Lock()
+        pending = list()
+
+        def write(line):
+            with lock:
+                stdout.write(line + '\n')
+                stdout.flush()
+
+        for line in stdin:
+            if line.strip():
+                self.dispatch(line, write, pending)
+            if not self.running:
+                break
+
+        self.pool.shutdown(wait=True)
+
+    def serve_unix(self, path):
+        """
+        Método para atendimento das requisições recebidas por um socket Unix (uma thread de leitura por conexão)
+        :param path: caminho do socket
+        :return: Requisições atendidas até a operação shutdown
+        """
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                lock = threading.Lock()
+                pending = list()
+
+                def write(line):
+                    with lock:
+                        try:
+                            self.wfile.write(line.encode() + b'\n')
+                        except OSError:
+                            # Conexão encerrada pelo cliente
+                            pass
+
+                for line in self.rfile:
+                    if line.strip():
+                        daemon.dispatch(line, write, pending)
+                    if not daemon.running:
+                        break
+
+                # Respostas pendentes enviadas antes do encerramento da conexão
+                wait(pending)
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        if os.path.exists(path):
+            os.remove(path)
+
+        self.server = Server(path, Handler)
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.server = None
+        self.pool.shutdown(wait=True)
+        os.remove(path)
+
+
+class DaemonClient:
+    """
+    Classe cliente do servidor por socket Unix (requisições sequenciais em uma conexão)
+    """
+
+    def __init__(self, path):
+        """
+        :param path: caminho do socket do servidor
+        """
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.file = self.sock.makefile('rb')
+        self.id = 0
+
+    def call(self, op, **params):
+        """
+        Método para envio de uma requisição e espera da resposta
+        :param op: operação (ver SolverDaemon)
+        :param params: parâmetros da operação
+        :return: Resultado da operação
+        """
+
+        self.id += 1
+        self.sock.sendall(json.dumps({'id': self.id, 'op': op, **params}, separators=(',', ':')).encode() + b'\n')
+        response = json.loads(self.file.readline())
+
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+
+        return response['result']
+
+    def close(self):
+        """
+        Método para encerramento da conexão
+        :return: Conexão encerrada
+        """
+
+        self.file.close()
+        self.sock.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor do fluxo de potência com Regulação Primária (JSON lines)')
+    parser.add_argument('--socket', default=None, help='caminho do socket Unix -> Default: entrada e saída padrão')
+    parser.add_argument('--workers', type=int, default=None, help='número de threads de atendimento')
+    parser.add_argument('--case', nargs=2, action='append', default=[], metavar=('NOME', 'ARQUIVO'),
+                        help='caso carregado na inicialização (pode ser repetido)')
+    parser.add_argument('--cache', default=None, help='diretório do armazenamento dos casos compilados')
+    parser.add_argument('--backend', default='numpy', help="backend dos resíduos e da Jacobiana: 'numpy', 'numba' "
+                                                           "ou 'auto'")
+    args = parser.parse_args()
+
+    daemon = SolverDaemon(workers=args.workers, cache=args.cache, backend=args.backend)
+    for name, file in args.case:
+        daemon.load(name, file)
+
+    if args.socket is None:
+        daemon.serve_stdio()
+    else:
+        daemon.serve_unix(args.socket)
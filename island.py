@@ -0,0 +1,191 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from case import bus_index, select
+from power_flow_gov import PowerFlowControl
+from ybus import Ybus
+
+
+def islands(dbar, dlin):
+    """
+    Método para identificação das ilhas elétricas (componentes conexas do grafo de barras e ramos)
+    :param dbar: DataFrame (ou Block) do bloco dbar
+    :param dlin: DataFrame (ou Block) do bloco dlin
+    :return: Número de ilhas e ilha de cada barra do bloco dbar
+    """
+
+    nbus = len(dbar['num'])
+
+    de = bus_index(dbar['num'], dlin['de'])
+    para = bus_index(dbar['num'], dlin['para'])
+    graph = sp.csr_matrix((np.ones(de.size), (de, para)), shape=(nbus, nbus))
+
+    return connected_components(graph, directed=False)
+
+
+def _solve_island(case):
+    """
+    Método para solução do fluxo de potência com Regulação Primária de uma ilha
+    :param case: tupla (dbar, dlin, dger, delta) da ilha
+    :return: Solução, fluxos nos ramos, número de iterações e convergência
+    """
+
+    dbar, dlin, dger, delta = case
+
+    pf = PowerFlowControl(dbar, dlin, dger, Ybus(dbar, dlin).calc_ybus(), delta)
+    try:
+        pf.newton_control(imprime=False)
+    except RuntimeError:
+        # Jacobiana singular
+        pf.converged = False
+
+    return pf.sol, pf.flow(), pf.iter, pf.converged
+
+
+class IslandPowerFlow:
+    """
+    Classe para cálculo do fluxo de potência com Regulação Primária em sistemas separados em ilhas elétricas
+
+    Cada ilha é resolvida separadamente (numeração original das barras), com frequência e referência angular próprias.
+    Ilhas sem barra VTheta utilizam como referência a barra do gerador de maior potência ativa especificada (campo p
+    do bloco dbar); empates são decididos pela maior margem (pg_max - p) e, em seguida, pelo menor número de barra. A
+    capacidade pg_max sozinha não é utilizada, pois unidades sem limite são representadas por pg_max = 99999. Ilhas sem
+    geração não são resolvidas e ilhas cuja solução não converge têm tensões, fluxos, potências geradas e frequência
+    iguais a NaN
+    """
+
+    def __init__(self, dbar, dlin, dger, delta, workers=None):
+        self.dbar = dbar
+        self.dlin = dlin
+        self.dger = dger
+        self.delta = delta
+
+        # Número de processos (1 -> solução no próprio processo)
+        self.workers = os.cpu_count() if workers is None else workers
+
+        # Potência base do sistema (em MVA) e frequência base
+        self.sbase = 100
+        self.fbase = 60
+
+        # Ilha de cada barra do bloco dbar e de cada gerador
+        self.nare, self.label = islands(dbar, dlin)
+        self.island = self.label[bus_index(dbar['num'], dger['num'])]
+
+    def split(self):
+        """
+        Método para separação do caso em ilhas
+        :return: Lista com barras (linhas do bloco dbar), ramos, geradores e caso de cada ilha
+        """
+
+        de = self.label[bus_index(self.dbar['num'], self.dlin['de'])]
+
+        parts = list()
+        for area in range(self.nare):
+            bus = np.flatnonzero(self.label == area)
+            lin = np.flatnonzero(de == area)
+            ger = np.flatnonzero(self.island == area)
+
+            # Blocos da ilha (numeração original das barras: índices internos contíguos em cada ilha)
+            dbar = select(self.dbar, bus)
+            dlin = select(self.dlin, lin)
+            dger = select(self.dger, ger)
+
+            # Referência angular da ilha caso não haja barra VTheta: gerador de maior potência ativa especificada
+            # (empates: maior margem e menor número de barra)
+            tipo = np.asarray(dbar['tipo'])
+            if ger.size and not np.any(tipo == 2):
+                gen = np.asarray(dger['num'], dtype=int)
+                ref = bus_index(dbar['num'], gen)
+                p = np.asarray(dbar['p'], dtype=float)[ref]
+                margin = np.asarray(dger['pg_max'], dtype=float) - p
+                best = np.lexsort((gen, -margin, -p))[0]
+                dbar['tipo'] = np.where(np.arange(bus.size) == ref[best], 2, tipo)
+
+            parts.append((bus, lin, ger, (dbar, dlin, dger, self.delta) if ger.size else None))
+
+        return parts
+
+    def run(self):
+        """
+        Método para solução das ilhas (ilhas independentes resolvidas simultaneamente)
+        :return: DataFrame com frequência, geração, carga, iterações e convergência de cada ilha
+        """
+
+        import pandas as pd
+
+        parts = self.split()
+        cases = [case for *_, case in parts if case is not None]
+
+        if self.workers == 1 or len(cases) == 1:
+            results = [_solve_island(case) for case in cases]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(cases))) as pool:
+                results = list(pool.map(_solve_island, cases))
+
+        nbus = len(self.dbar['num'])
+        nger = len(self.dger['num'])
+        nlin = len(self.dlin['de'])
+
+        # Solução do sistema completo (barras e geradores de ilhas sem geração ou sem convergência permanecem NaN)
+        self.sol = {
+            'voltage': np.full(nbus, np.nan),
+            'theta': np.full(nbus, np.nan),
+            'pg': np.full(nger, np.nan),
+            'qg': np.full(nger, np.nan),
+            'f': np.full(self.nare, np.nan)
+        }
+        self.power_flow = {key: np.full(nlin, np.nan) for key in ('flow_p', 'flow_q', 'flow_p_para', 'flow_q_para',
+                                                                   'loss_p', 'loss_q', 'loading', 'loading_emerg')}
+
+        table = list()
+        results = iter(results)
+        p_load = np.asarray(self.dbar['p_load'], dtype=float) * (1 + self.delta * 1e-2)
+
+        for area, (bus, lin, ger, case) in enumerate(parts):
+            row = {
+                'island': area,
+                'nbus': bus.size,
+                'nger': ger.size,
+                'f': np.nan,
+                'pg': 0.,
+                'p_load': np.sum(p_load[bus]),
+                'iter': 0,
+                'converged': False
+            }
+
+            if case is not None:
+                sol, flow, it, converged = next(results)
+                row.update(iter=it, converged=converged)
+
+                if not converged:
+                    row.update(pg=np.nan)
+                    table.append(row)
+                    continue
+
+                self.sol['voltage'][bus] = sol['voltage']
+                self.sol['theta'][bus] = sol['theta']
+                self.sol['pg'][ger] = sol['pg']
+                self.sol['qg'][ger] = sol['qg']
+                self.sol['f'][area] = sol['f']
+                for key in self.power_flow:
+                    self.power_flow[key][lin] = flow[key]
+
+                row.update(f=sol['f'] * self.fbase, pg=np.sum(sol['pg']) * self.sbase)
+
+            table.append(row)
+
+        # Despacho de cada gerador e convergência da ilha do gerador
+        converged = np.array([row['converged'] for row in table], dtype=bool)
+        self.dispatch = pd.DataFrame(data={
+            'num': np.asarray(self.dger['num']),
+            'island': self.island,
+            'pg': self.sol['pg'] * self.sbase,
+            'qg': self.sol['qg'] * self.sbase,
+            'converged': converged[self.island]
+        })
+
+        return pd.DataFrame(table)
@@ -0,0 +1,128 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Backend compilado disponível (requer o pacote numba)
+AVAILABLE = njit is not None
+
+
+def _phasor(vm, va, v):
+    """
+    Kernel para cálculo dos fasores de tensão
+    :param vm: módulos das tensões
+    :param va: ângulos das tensões (em rad)
+    :param v: buffer dos fasores (preenchido no próprio array)
+    """
+
+    for i in range(vm.size):
+        v[i] = vm[i] * np.cos(va[i]) + 1j * vm[i] * np.sin(va[i])
+
+
+def _power(indptr, indices, data, vm, va, v, p, q):
+    """
+    Kernel para cálculo das potências ativa e reativa injetadas (S = V * conj(Ybus * V)), uma barra por iteração
+    :param indptr: ponteiros das linhas da Ybus (CSR)
+    :param indices: colunas dos elementos não nulos da Ybus
+    :param data: elementos não nulos da Ybus
+    :param vm: módulos das tensões
+    :param va: ângulos das tensões (em rad)
+    :param v: buffer dos fasores de tensão (preenchido no próprio array)
+    :param p: buffer das potências ativas (preenchido no próprio array)
+    :param q: buffer das potências reativas (preenchido no próprio array)
+    """
+
+    _phasor(vm, va, v)
+
+    for i in range(v.size):
+        current = 0j
+        for k in range(indptr[i], indptr[i + 1]):
+            current += data[k] * v[indices[k]]
+        s = v[i] * np.conj(current)
+        p[i] = s.real
+        q[i] = s.imag
+
+
+def _jacobian(indptr, indices, data, vm, va, v, pos, first, out):
+    """
+    Kernel para cálculo dos valores das submatrizes H, N, M e L da Jacobiana Expandida, uma barra por iteração
+    :param indptr: ponteiros das linhas da Ybus (CSR)
+    :param indices: colunas dos elementos não nulos da Ybus
+    :param data: elementos não nulos da Ybus
+    :param vm: módulos das tensões
+    :param va: ângulos das tensões (em rad)
+    :param v: buffer dos fasores de tensão (preenchido no próprio array)
+    :param pos: posição de cada valor (H, N, M e L, na ordem de PowerFlowControl.jacobiana) no vetor de dados da
+     Jacobiana
+    :param first: True para o primeiro valor (na ordem do kernel) de cada posição da submatriz H: o valor é atribuído
+     e os valores repetidos seguintes (ex.: termo adicional da diagonal) são acumulados, sem zerar o vetor de dados
+    :param out: vetor de dados da Jacobiana (preenchido no próprio array)
+    """
+
+    _phasor(vm, va, v)
+
+    n = v.size
+    nnz = indptr[n]
+    size = nnz + n
+
+    for i in range(n):
+        current = 0j
+        for k in range(indptr[i], indptr[i + 1]):
+            j = indices[k]
+            yv = data[k] * v[j]
+            current += yv
+
+            # dS/dTheta e dS/dV associados ao elemento (i, j)
+            ds_dth = -1j * v[i] * np.conj(yv)
+            ds_dv = v[i] * np.conj(yv) / vm[j]
+            if first[k]:
+                out[pos[k]] = ds_dth.real
+                out[pos[size + k]] = ds_dv.real
+                out[pos[2 * size + k]] = ds_dth.imag
+                out[pos[3 * size + k]] = ds_dv.imag
+            else:
+                out[pos[k]] += ds_dth.real
+                out[pos[size + k]] += ds_dv.real
+                out[pos[2 * size + k]] += ds_dth.imag
+                out[pos[3 * size + k]] += ds_dv.imag
+
+        # Termos adicionais da diagonal
+        k = nnz + i
+        ds_dth = 1j * v[i] * np.conj(current)
+        ds_dv = np.conj(current) * v[i] / vm[i]
+        if first[k]:
+            out[pos[k]] = ds_dth.real
+            out[pos[size + k]] = ds_dv.real
+            out[pos[2 * size + k]] = ds_dth.imag
+            out[pos[3 * size + k]] = ds_dv.imag
+        else:
+            out[pos[k]] += ds_dth.real
+            out[pos[size + k]] += ds_dv.real
+            out[pos[2 * size + k]] += ds_dth.imag
+            out[pos[3 * size + k]] += ds_dv.imag
+
+
+# Kernels sequenciais: as regiões paralelas (prange) não reduzem o tempo total da solução, dominado pela fatoração LU,
+# e as threads do numba disputam os processadores com a fatoração
+if AVAILABLE:
+    _phasor = njit(cache=True)(_phasor)
+    power = njit(cache=True)(_power)
+    jacobian = njit(cache=True)(_jacobian)
+
+
+def load(backend):
+    """
+    Método para seleção do backend de cálculo dos resíduos e da Jacobiana
+    :param backend: 'numpy', 'numba' (requer o pacote numba) ou 'auto' (numba, se disponível)
+    :return: Nome do backend selecionado
+    """
+
+    if backend not in ('numpy', 'numba', 'auto'):
+        raise ValueError(f"Backend {backend!r} inválido: utilize 'numpy', 'numba' ou 'auto'")
+
+    if backend == 'numba' and not AVAILABLE:
+        raise ImportError("Backend 'numba' requer o pacote numba")
+
+    return 'numba' if backend != 'numpy' and AVAILABLE else 'numpy'
@@ -0,0 +1,141 @@
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+
+class SparseLUSolver:
+    """
+    Classe para solução de sistemas lineares esparsos por fatoração LU (SuperLU)
+
+    A ordenação das colunas (redução de preenchimento) e o mapeamento dos elementos da matriz permutada são calculados
+    uma única vez por topologia e reaproveitados nas fatorações seguintes
+    """
+
+    def __init__(self, ordering='COLAMD'):
+        # Ordenação utilizada na análise simbólica
+        self.ordering = ordering
+
+        # Estrutura analisada (indptr e indices da matriz CSR)
+        self.indptr = None
+        self.indices = None
+
+        # Permutação das colunas e posição de cada elemento da matriz permutada no vetor de dados da matriz original
+        self.perm = None
+        self.map = None
+        self.perm_a = None
+
+        # Fatoração numérica corrente (e indicação se foi obtida sobre a matriz permutada)
+        self.lu = None
+        self.permuted = False
+
+        # Contadores
+        self.nanalyze = 0
+        self.nfact = 0
+        self.nsolve = 0
+
+    def same_pattern(self, a):
+        """
+        Método para verificação da estrutura da matriz
+        :param a: matriz esparsa CSR
+        :return: True se a estrutura for a mesma da última análise simbólica
+        """
+
+        return self.indptr is not None and self.indices.size == a.indices.size and \
+            np.array_equal(self.indptr, a.indptr) and np.array_equal(self.indices, a.indices)
+
+    def analyze(self, a):
+        """
+        Método para análise simbólica: ordenação das colunas e mapeamento dos elementos da matriz permutada
+        :param a: matriz esparsa CSR
+        :return: Primeira fatoração numérica da matriz
+        """
+
+        self.indptr = a.indptr.copy()
+        self.indices = a.indices.copy()
+
+        self.lu = splu(a.tocsc(), permc_spec=self.ordering)
+        self.permuted = False
+        self.perm = np.argsort(self.lu.perm_c)
+
+        # Mesma estrutura com dados iguais às posições dos elementos em a.data
+        pos = sp.csr_matrix((np.arange(a.nnz, dtype=float), a.indices, a.indptr), shape=a.shape).tocsc()[:, self.perm]
+        pos.sort_indices()
+        self.map = pos.data.astype(int)
+        self.perm_a = sp.csc_matrix((np.zeros(a.nnz), pos.indices, pos.indptr), shape=a.shape)
+
+        self.nanalyze += 1
+        self.nfact += 1
+
+    def factorize(self, a):
+        """
+        Método para fatoração numérica da matriz
+        :param a: matriz esparsa (ou densa)
+        :return: Fatoração LU armazenada em self.lu
+        """
+
+        a = sp.csr_matrix(a)
+
+        if not self.same_pattern(a):
+            self.analyze(a)
+            return
+
+        # Reaproveita ordenação e estrutura: apenas os valores da matriz permutada são atualizados
+        self.perm_a.data[:] = a.data[self.map]
+        self.lu = splu(self.perm_a, permc_spec='NATURAL')
+        self.permuted = True
+
+        self.nfact += 1
+
+    def solve(self, b):
+        """
+        Método para solução do sistema linear com a fatoração corrente
+        :param b: vetor independente
+        :return: Vetor solução
+        """
+
+        self.nsolve += 1
+
+        if not self.permuted:
+            return self.lu.solve(b)
+
+        x = np.empty_like(b)
+        x[self.perm] = self.lu.solve(b)
+
+        return x
+
+
+class DenseLUSolver:
+    """
+    Classe para solução de sistemas lineares por fatoração LU densa (LAPACK)
+    """
+
+    def __init__(self):
+        # Fatoração numérica corrente
+        self.lu = None
+
+        # Contadores
+        self.nfact = 0
+        self.nsolve = 0
+
+    def factorize(self, a):
+        """
+        Método para fatoração numérica da matriz
+        :param a: matriz esparsa (ou densa)
+        :return: Fatoração LU armazenada em self.lu
+        """
+
+        self.lu = la.lu_factor(a.toarray() if sp.issparse(a) else a, check_finite=False)
+
+        self.nfact += 1
+
+    def solve(self, b):
+        """
+        Método para solução do sistema linear com a fatoração corrente
+        :param b: vetor independente
+        :return: Vetor solução
+        """
+
+        self.nsolve += 1
+
+        return la.lu_solve(self.lu, b, check_finite=False)
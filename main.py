@@ -1,13 +1,12 @@
-from read_file import ReadFile
-from ybus import Ybus
+from cache import CaseCache
 from power_flow_gov import PowerFlowControl
 import os
 
 file = os.path.join('IEEE 24 Barras FREQ.pwf')
 
-dbar, dlin, dger = ReadFile().read_file(file)
-
-ybus = Ybus(dbar=dbar, dlin=dlin).calc_ybus()
+# Caso compilado (blocos dbar, dlin, dger e matriz Ybus) armazenado em disco após a primeira leitura (blocos
+# compactos: metadados de texto decodificados somente quando acessados)
+dbar, dlin, dger, ybus = CaseCache().load(file, frames=False)
 
 # Aumento/redução de carga desejada em todas as barras do sistema
 deltaLoad = -10.
@@ -1,5 +1,12 @@
+import time
+from contextlib import contextmanager
+
 import numpy as np
-import plotly.graph_objects as go
+import scipy.sparse as sp
+
+from case import bus_index
+from linear_solver import SparseLUSolver
+from ybus import MutableYbus, Ybus
 
 
 class PowerFlowControl:
@@ -7,14 +14,40 @@ class PowerFlowControl:
     Classe para cálculo do fluxo de potência com Regulação Primária de acordo com método de Newton-Raphson
     """
 
-    def __init__(self, dbar, dlin, dger, ybus, delta):
+    def __init__(self, dbar, dlin, dger, ybus, delta, solver=None, dishonest=False, sol=None, trace=None,
+                 backend='numpy'):
         self.dbar = dbar
         self.dlin = dlin
         self.dger = dger
-        self.ybus = ybus
 
-        # Número de barras do sistema
-        self.nbus = int(dbar.max()['num'])
+        # Ybus alterável (ver ybus.MutableYbus): matriz e modelo pi dos ramos compartilhados e atualizados a cada
+        # alteração
+        self.ymut = ybus if isinstance(ybus, MutableYbus) else None
+        self.ybus = ybus.ybus if self.ymut is not None else ybus
+
+        # Solver linear (objeto com métodos factorize e solve) -> Default: LU esparsa
+        self.solver = SparseLUSolver() if solver is None else solver
+
+        # Newton desonesto: mantém a fatoração enquanto o resíduo máximo cair abaixo de stall_ratio vezes o anterior
+        self.dishonest = dishonest
+        self.stall_ratio = 0.25
+        self.nfact = 0
+
+        # Backend de cálculo das potências injetadas e da Jacobiana: 'numpy', 'numba' (kernels compilados, ver kernels)
+        # ou 'auto' (numba, se disponível). O backend compilado reduz o tempo do cálculo da Jacobiana, mas o tempo total
+        # da solução é dominado pela fatoração LU (ver benchmark.py --backend)
+        self.backend = backend
+        self.kernels = None
+
+        # Registro das iterações (objeto com método emit, ver tracing.Trace), tempo acumulado por etapa na última
+        # solução, resíduo máximo por bloco de equações a cada iteração e eventos de limite de potência ativa
+        self.trace = trace
+        self.times = dict()
+        self.history = list()
+        self.limit_events = list()
+
+        # Número de barras do sistema (índices internos contíguos: linha da barra no bloco dbar)
+        self.nbus = len(dbar['num'])
 
         # Potência base do sistema (em MVA)
         self.sbase = 100
@@ -22,12 +55,17 @@ class PowerFlowControl:
         # Iteration counter
         self.iter = 0
         self.iter_max = 10
+        self.converged = False
+
+        # Número máximo de iterações do método desacoplado rápido e método utilizado na última solução
+        self.iter_max_fd = 30
+        self.method = None
 
         # Tolerance
         self.e = 1e-6
 
         # Número de geradores do sistema
-        self.nger = self.dger.shape[0]
+        self.nger = len(self.dger['num'])
 
         # Número de áreas (ilhas elétricas)
         self.nare = 1
@@ -35,35 +73,108 @@ class PowerFlowControl:
         # Dimensão da Jacobiana
         self.dim = 2 * self.nbus + 2 * self.nger + self.nare
 
+        # Estado de cada gerador em relação aos limites de potência ativa e reativa (-1: mínimo, 0: livre, 1: máximo)
+        self.limit_state = np.zeros(self.nger, dtype=int)
+        self.q_state = np.zeros(self.nger, dtype=int)
+
+        # Tratamento de limites de potência reativa (chaveamento PV -> PQ), tolerância (em p.u.), número máximo de
+        # mudanças de estado de cada gerador e número de soluções com o conjunto ativo de limites (iterações externas)
+        self.qlim = True
+        self.q_tol = 1e-4
+        self.q_switch_max = 3
+        self.q_switches = np.zeros(self.nger, dtype=int)
+        self.outer = 0
+
         # Frequência base
         self.fbase = 60
 
         # Frequência especificada
         self.fesp = 1
 
+        # Arrays de índices e parâmetros do caso
+        self.compile_case()
+
+        # Estrutura esparsa da Jacobiana Expandida (calculada na primeira solução e mantida nas seguintes)
+        self.jacob = None
+
+        # Importação sob demanda: o numba só é carregado quando o backend compilado é solicitado
+        if backend != 'numpy':
+            import kernels
+
+            self.backend = kernels.load(backend)
+            if self.backend == 'numba':
+                self.kernels = kernels
+
+                # Ybus em formato CSR e buffers dos fasores de tensão e das potências injetadas (mantidos entre as
+                # chamadas dos kernels)
+                self.ykern = self.ybus if sp.isspmatrix_csr(self.ybus) else sp.csr_matrix(self.ybus)
+                self.buffer = {
+                    'v': np.zeros(self.nbus, dtype=complex),
+                    'p': np.zeros(self.nbus),
+                    'q': np.zeros(self.nbus)
+                }
+
         # Dicionário para armazenar a solução inicial
         self.sol = {
-            'voltage': np.array(self.dbar['tensao'] * 1e-3),
-            'theta': np.array(np.radians(self.dbar['angulo'])),
-            'pg': np.zeros(self.nger),
-            'qg': np.zeros(self.nger),
+            'voltage': self.case['tensao'].copy(),
+            'theta': self.case['angulo'].copy(),
+            'pg': self.case['p'][self.gbus],
+            'qg': self.case['q'][self.gbus],
             'f': 1.
         }
 
-        ng = 0
-        for idx, value in self.dbar.iterrows():
-            if value['tipo'].strip() == '':
-                pass
-            else:
-                self.sol['pg'][ng] = float(value['p'])
-                self.sol['qg'][ng] = float(value['q'])
-                ng += 1
-
-        self.sol['pg'] /= self.sbase
-        self.sol['qg'] /= self.sbase
+        # Solução inicial fornecida (partida a quente a partir de uma solução convergida)
+        if sol is not None:
+            self.sol = {key: np.array(value, dtype=float) for key, value in sol.items()}
+            self.sol['f'] = float(sol['f'])
 
         self.delta = 1 + delta * 1e-2
 
+    def compile_case(self):
+        """
+        Método para compilação do caso: arrays de índices e de parâmetros (em p.u.) utilizados a cada iteração
+        :return: Barras PQ, de geração e de referência angular, barra de cada gerador e dicionário de parâmetros
+        """
+
+        tipo = np.asarray(self.dbar['tipo'])
+
+        # Barra (índice interno) de cada gerador do bloco dger
+        self.gen_bus = bus_index(self.dbar['num'], self.dger['num'])
+
+        # Barras PQ, barras de geração (PV e VTheta, na ordem do bloco dger) e barra de referência angular (VTheta)
+        self.pq = np.flatnonzero(tipo == 0)
+        self.gbus = self.gen_bus
+        self.slack = np.flatnonzero(tipo == 2)
+
+        def column(frame, name):
+            return np.asarray(frame[name], dtype=float)
+
+        self.case = {
+            'p': column(self.dbar, 'p') / self.sbase,
+            'q': column(self.dbar, 'q') / self.sbase,
+            'p_load': column(self.dbar, 'p_load') / self.sbase,
+            'q_load': column(self.dbar, 'q_load') / self.sbase,
+            'tensao': column(self.dbar, 'tensao') * 1e-3,
+            'angulo': np.radians(column(self.dbar, 'angulo')),
+            'est': column(self.dger, 'est') * 1e-2,
+            'pg_min': column(self.dger, 'pg_min') / self.sbase,
+            'pg_max': column(self.dger, 'pg_max') / self.sbase,
+
+            # Limites de potência reativa de cada gerador (barras de geração na ordem do bloco dger)
+            'q_min': column(self.dbar, 'q_min')[self.gbus] / self.sbase,
+            'q_max': column(self.dbar, 'q_max')[self.gbus] / self.sbase
+        }
+
+        # Geradores da barra VTheta (sem chaveamento PV -> PQ)
+        self.slack_gen = tipo[self.gbus] == 2
+
+        # Modelo pi de cada ramo (barras de e para, yff, yft, ytf, ytt) e capacidades (em MVA)
+        self.pi = self.ymut.pi if self.ymut is not None else Ybus(self.dbar, self.dlin).branch()
+        self.capac = {
+            'norm': column(self.dlin, 'capac_norm'),
+            'emerg': column(self.dlin, 'capac_emerg')
+        }
+
     def freq_ger(self):
         """
         Método para cálculo das frequências máximas e mínimas de operação de cada gerador
@@ -71,289 +182,287 @@ class PowerFlowControl:
          ativa
         """
 
+        pg = self.case['p'][self.gen_bus]
+
         self.freq_g = {
-            'max': np.zeros(self.nger),
-            'min': np.zeros(self.nger)
+            'max': self.fesp + self.case['est'] * (pg - self.case['pg_min']),
+            'min': self.fesp + self.case['est'] * (pg - self.case['pg_max'])
         }
 
-        for idx, value in self.dger.iterrows():
-            self.freq_g['max'][idx] = self.fesp + float(value['est']) * 1e-2 * \
-                                      (float(self.dbar['p'][int(value['num']) - 1]) - float(value['pg_min'])) \
-                                      / self.sbase
-
-            self.freq_g['min'][idx] = self.fesp + float(value['est']) * 1e-2 * \
-                                      (float(self.dbar['p'][int(value['num']) - 1]) - float(value['pg_max'])) \
-                                      / self.sbase
-
     def value_spec(self):
         """
         Método para armazenamento de parâmetros especificados
         :return: Dicionário com valores especificados para cada parâmetro
         """
 
+        case = self.case
+
         self.value_esp = {
-            'tipo': np.zeros(self.nbus),
-            'p_esp': np.zeros(self.nbus),
-            'q_esp': np.zeros(self.nbus),
-            'pg_esp': np.zeros(self.nger),
-            'qg_esp': np.zeros(self.nger),
+            'tipo': np.asarray(self.dbar['tipo'], dtype=float),
+            'p_esp': case['p'] - case['p_load'] * self.delta,
+            'q_esp': case['q'] - case['q_load'] * self.delta,
+
+            # Potências geradas especificadas (barras PV e VTheta)
+            'pg_esp': case['p'][self.gbus],
+            'qg_esp': case['q'][self.gbus],
+
+            # Tensão especificada (barras PV e VTheta) e ângulo especificado (barra VTheta)
             'v_esp': np.zeros(self.nbus),
             'theta_esp': np.zeros(self.nbus)
         }
 
-        ng = 0
+        self.value_esp['v_esp'][self.gbus] = case['tensao'][self.gbus]
+        self.value_esp['theta_esp'][self.slack] = case['angulo'][self.slack]
 
-        for idx, value in self.dbar.iterrows():
+    def calc_power(self):
+        """
+        Método para cálculo das potências ativa e reativa injetadas em todas as barras
+        :return: Potências ativa e reativa nas barras -> S = V * conj(Ybus * V)
+        """
 
-            # Tipo de barra
-            if value['tipo'].strip() == '':
-                # Valor default '' ou 0 - Barra PQ
-                self.value_esp['tipo'][idx] = 0
-            else:
-                # Barra PV e VTheta
-                self.value_esp['tipo'][idx] = int(value['tipo'])
+        if self.kernels is not None:
+            y, buf = self.ykern, self.buffer
+            self.kernels.power(y.indptr, y.indices, y.data, self.sol['voltage'], self.sol['theta'], buf['v'], buf['p'],
+                               buf['q'])
+            return buf['p'], buf['q']
 
-                # Potência ativa gerada
-                self.value_esp['pg_esp'][ng] = float(value['p'])
+        v = self.sol['voltage'] * np.exp(1j * self.sol['theta'])
+        s = v * np.conj(self.ybus @ v)
 
-                # Potência reativa gerada
-                self.value_esp['qg_esp'][ng] = float(value['q'])
+        return s.real, s.imag
 
-                # Incrementa contador
-                ng += 1
+    def jacobiana(self):
+        """
+        Método para cálculo da matriz Jacobiana Expandida
+        :return: Matriz Jacobiana (esparsa, com estrutura definida em jacobiana_exp)
+        """
 
-            # Potência ativa
-            if value['p'].strip() == '':
-                self.value_esp['p_esp'][idx] += 0.
-            else:
-                self.value_esp['p_esp'][idx] += float(value['p'])
+        if self.kernels is not None:
+            # Submatrizes H, N, M e L calculadas diretamente no vetor de dados da Jacobiana e elementos que dependem do
+            # conjunto ativo de limites (demais elementos da Regulação Primária constantes, escritos em jacobiana_exp)
+            y, buf = self.ycsr, self.buffer
+            self.kernels.jacobian(y.indptr, y.indices, y.data, self.sol['voltage'], self.sol['theta'], buf['v'],
+                                  self.jac_map, self.jac_first, self.jacob.data)
 
-            if value['p_load'].strip() == '':
-                self.value_esp['p_esp'][idx] -= 0.
-            else:
-                self.value_esp['p_esp'][idx] -= float(value['p_load']) * self.delta
+            for pos, values in zip(self.jac_active, self.active_set()):
+                self.jacob.data[pos] = values
+            return
 
-            # Potência reativa
-            if value['q'].strip() == '':
-                self.value_esp['q_esp'][idx] += 0.
-            else:
-                self.value_esp['q_esp'][idx] += float(value['q'])
+        v = self.sol['voltage'] * np.exp(1j * self.sol['theta'])
+        y = self.ycsr.data
 
-            if value['q_load'].strip() == '':
-                self.value_esp['q_esp'][idx] -= 0.
-            else:
-                self.value_esp['q_esp'][idx] -= float(value['q_load']) * self.delta
+        # Termos associados aos elementos não nulos da Ybus: dS/dTheta e dS/dV
+        ds_dth = -1j * v[self.yrow] * np.conj(y * v[self.ycol])
+        ds_dv = v[self.yrow] * np.conj(y * v[self.ycol]) / self.sol['voltage'][self.ycol]
 
-            if value['tipo'].strip() == '':
-                pass
-            else:
-                self.value_esp['v_esp'][idx] = float(value['tensao']) * 1e-3
+        # Termos adicionais da diagonal
+        i = self.ycsr @ v
+        ds_dth = np.concatenate((ds_dth, 1j * v * np.conj(i)))
+        ds_dv = np.concatenate((ds_dv, np.conj(i) * v / self.sol['voltage']))
 
-                if value['tipo'].strip() == '2':
-                    self.value_esp['theta_esp'][idx] = np.radians(float(value['angulo']))
-                else:
-                    pass
+        # Submatrizes H, N, M e L seguidas das submatrizes da Regulação Primária e do controle de tensão
+        cf, eqg, wqg = self.active_set()
+        values = np.concatenate((ds_dth.real, ds_dv.real, ds_dth.imag, ds_dv.imag,
+                                 -np.ones(self.nger), -np.ones(self.nger), np.ones(self.nger), cf,
+                                 eqg, np.ones(self.slack.size), wqg))
 
-        self.value_esp['p_esp'] /= self.sbase
-        self.value_esp['q_esp'] /= self.sbase
-        self.value_esp['pg_esp'] /= self.sbase
-        self.value_esp['qg_esp'] /= self.sbase
+        # Atualiza somente os valores numéricos (elementos repetidos são somados)
+        self.jacob.data[:] = np.bincount(self.jac_map, weights=values, minlength=self.jacob.nnz)
 
-    def calc_p(self, bar):
+    def jacobiana_exp(self):
         """
-        Método para cálculo da potência ativa na barra bar
-        :param bar: Número da barra
-        :return: Potência ativa na barra
+        Método para cálculo da estrutura esparsa da Jacobiana Expandida e das submatrizes da Regulação Primária
+        :return: Estrutura da matriz Jacobiana
         """
 
-        p = 0.
-
-        for idx in range(self.nbus):
-            p += self.sol['voltage'][idx] * \
-                 (self.ybus[bar][idx].real * np.cos(self.sol['theta'][bar] - self.sol['theta'][idx]) +
-                  self.ybus[bar][idx].imag * np.sin(self.sol['theta'][bar] - self.sol['theta'][idx]))
-
-        p *= self.sol['voltage'][bar]
-
-        return p
+        # Submatriz cf da Regulação Primária (geradores livres)
+        self.cf = 1. / self.case['est']
+
+        # Coordenadas dos elementos não nulos da Ybus
+        self.ycsr = self.ybus.tocsr() if sp.issparse(self.ybus) else sp.csr_matrix(self.ybus)
+        self.yrow = np.repeat(np.arange(self.nbus), np.diff(self.ycsr.indptr))
+        self.ycol = self.ycsr.indices
+
+        # Início de cada bloco de variáveis/equações: Theta/P, V/Q, Pg/Y, Qg/W, f/Z
+        iv = self.nbus
+        ipg = 2 * self.nbus
+        iqg = ipg + self.nger
+        ifr = iqg + self.nger
+
+        bus = np.arange(self.nbus)
+        gen = np.arange(self.nger)
+        hrow = np.concatenate((self.yrow, bus))
+        hcol = np.concatenate((self.ycol, bus))
+
+        # Mesma ordem dos valores calculados em jacobiana: H, N, M, L, apg, bqg, cpg, cf, eqg, ft, wqg (estrutura fixa:
+        # mudanças do conjunto ativo de limites alteram apenas os valores)
+        row = np.concatenate((hrow, hrow, hrow + iv, hrow + iv,
+                              self.gbus, self.gbus + iv, ipg + gen, ipg + gen, iqg + gen,
+                              np.full(self.slack.size, ifr), iqg + gen))
+        col = np.concatenate((hcol, hcol + iv, hcol, hcol + iv,
+                              ipg + gen, iqg + gen, ipg + gen, np.full(self.nger, ifr), self.gbus + iv,
+                              self.slack, iqg + gen))
+
+        key, self.jac_map = np.unique(row * self.dim + col, return_inverse=True)
+
+        # Número de valores das submatrizes H, N, M e L
+        self.nnet = 4 * hrow.size
+        self.jacob = sp.csr_matrix((np.zeros(key.size), key % self.dim,
+                                    np.searchsorted(key // self.dim, np.arange(self.dim + 1))),
+                                   shape=(self.dim, self.dim))
+
+        if self.kernels is not None:
+            # Primeiro valor de cada posição das submatrizes H, N, M e L na ordem dos kernels (atribuído; os valores
+            # repetidos seguintes são acumulados)
+            size = hrow.size
+            self.jac_first = np.zeros(size, dtype=bool)
+            self.jac_first[np.unique(self.jac_map[:size], return_index=True)[1]] = True
+
+            # Elementos constantes da Regulação Primária (apg, bqg, cpg e ft) escritos uma única vez e posições dos
+            # elementos cf, eqg e wqg (atualizados a cada cálculo da Jacobiana)
+            gov = self.jac_map[self.nnet:]
+            ng, ns = self.nger, self.slack.size
+            self.jacob.data[gov[:3 * ng]] = np.repeat([-1., -1., 1.], ng)
+            self.jacob.data[gov[5 * ng:5 * ng + ns]] = 1.
+            self.jac_active = (gov[3 * ng:4 * ng], gov[4 * ng:5 * ng], gov[5 * ng + ns:])
 
-    def calc_q(self, bar):
+    def calc_res(self):
         """
-        Método para cálculo da potência reativa na barra bar
-        :param bar: Número da barra
-        :return: Potência reativa na barra
+        Método para cálculo dos resíduos
+        :return: Resíduos (deltaP, deltaQ, deltaY, deltaW, deltaZ)
         """
 
-        q = 0.
+        # Potências injetadas nas barras
+        p, q = self.calc_power()
 
-        for idx in range(self.nbus):
-            q += self.sol['voltage'][idx] * \
-                 (self.ybus[bar][idx].real * np.sin(self.sol['theta'][bar] - self.sol['theta'][idx]) -
-                  self.ybus[bar][idx].imag * np.cos(self.sol['theta'][bar] - self.sol['theta'][idx]))
+        # Cálculo dos resíduos DeltaP e DeltaQ (barras PQ: injeção especificada; barras de geração: potência gerada)
+        self.deltaP = -p
+        self.deltaQ = -q
 
-        q *= self.sol['voltage'][bar]
+        self.deltaP[self.pq] += self.value_esp['p_esp'][self.pq]
+        self.deltaQ[self.pq] += self.value_esp['q_esp'][self.pq]
 
-        return q
+        self.deltaP[self.gbus] += self.sol['pg'] - self.case['p_load'][self.gbus] * self.delta
+        self.deltaQ[self.gbus] += self.sol['qg'] - self.case['q_load'][self.gbus] * self.delta
 
-    def jacobiana(self):
-        """
-        Método para cálculo da matriz Jacobiana Expandida
-        :return: Matriz Jacobiana
-        """
-
-        # Submatrizes da matriz jacobiana
-        self.h = np.zeros([self.nbus, self.nbus])
-        self.n = np.zeros([self.nbus, self.nbus])
-        self.m = np.zeros([self.nbus, self.nbus])
-        self.l = np.zeros([self.nbus, self.nbus])
-
-        for idx in range(self.nbus):
-            for idy in range(self.nbus):
-                if idx is idy:
-                    # Elemento Hkk
-                    self.h[idx, idy] += (-self.sol['voltage'][idx] ** 2) * self.ybus[idx][idy].imag - self.calc_q(idx)
-
-                    # Elemento Nkk
-                    self.n[idx, idy] += (self.calc_p(idx) + self.sol['voltage'][idx] ** 2 * self.ybus[idx][idy].real) \
-                                        / self.sol['voltage'][idx]
-
-                    # Elemento Mkk
-                    self.m[idx, idy] += self.calc_p(idx) - (self.sol['voltage'][idx] ** 2) * self.ybus[idx][idy].real
-
-                    # Elemento Lkk
-                    self.l[idx, idy] += (self.calc_q(idx) - self.sol['voltage'][idx] ** 2 * self.ybus[idx][idy].imag) \
-                                        / self.sol['voltage'][idx]
-                else:
-                    # Elemento Hkm
-                    self.h[idx, idy] += self.sol['voltage'][idx] * self.sol['voltage'][idy] * (
-                            self.ybus[idx][idy].real * np.sin(self.sol['theta'][idx] - self.sol['theta'][idy]) -
-                            self.ybus[idx][idy].imag * np.cos(self.sol['theta'][idx] - self.sol['theta'][idy]))
-
-                    # Elemento Nkm
-                    self.n[idx, idy] += self.sol['voltage'][idx] * (
-                            self.ybus[idx][idy].real * np.cos(self.sol['theta'][idx] - self.sol['theta'][idy]) +
-                            self.ybus[idx][idy].imag * np.sin(self.sol['theta'][idx] - self.sol['theta'][idy]))
-
-                    # Elemento Mkm
-                    self.m[idx, idy] -= self.sol['voltage'][idx] * self.sol['voltage'][idy] * (
-                            self.ybus[idx][idy].real * np.cos(self.sol['theta'][idx] - self.sol['theta'][idy]) +
-                            self.ybus[idx][idy].imag * np.sin(self.sol['theta'][idx] - self.sol['theta'][idy]))
-
-                    # Elemento Lkm
-                    self.l[idx, idy] += self.sol['voltage'][idx] * (
-                            self.ybus[idx][idy].real * np.sin(self.sol['theta'][idx] - self.sol['theta'][idy]) -
-                            self.ybus[idx][idy].imag * np.cos(self.sol['theta'][idx] - self.sol['theta'][idy]))
-
-        self.jacob = np.concatenate((self.h, self.m, np.zeros([2 * self.nger, self.nbus]), self.ft))
-        self.jacob = np.concatenate((self.jacob, np.concatenate((self.n, self.l, np.zeros([self.nger, self.nbus]),
-                                                                 self.eqg, np.zeros([self.nare, self.nbus])))), axis=1)
-        self.jacob = np.concatenate((self.jacob, np.concatenate((self.apg, np.zeros([self.nbus, self.nger]), self.cpg,
-                                                                 np.zeros([self.nger + self.nare, self.nger])))), axis=1
-                                    )
-        self.jacob = np.concatenate((self.jacob, np.concatenate((np.zeros([self.nbus, self.nger]), self.bqg,
-                                                                 np.zeros([2 * self.nger + self.nare, self.nger])))),
-                                    axis=1)
-        self.jacob = np.concatenate((self.jacob, np.concatenate((np.zeros([2 * self.nbus, self.nare]), self.cf,
-                                                                 np.zeros([self.nger + self.nare, self.nare])))),
-                                    axis=1)
+        # Cálculo do resíduo DeltaY
+        # Tratamento de limite de potência ativa: potência gerada fixa no limite
+        self.deltaY = np.where(self.limit_state != 0, 0., self.value_esp['pg_esp'] - self.sol['pg'] -
+                               (self.sol['f'] - self.fesp) / self.case['est'])
 
-    def jacobiana_exp(self):
+        # Cálculo dos resíduos DeltaW e DeltaZ
+        # Tratamento de limite de potência reativa: barras PV convertidas em PQ com potência reativa fixa no limite
+        q_lim = np.where(self.q_state > 0, self.case['q_max'], self.case['q_min'])
+        self.deltaW = np.where(self.q_state != 0, q_lim - self.sol['qg'],
+                               self.value_esp['v_esp'][self.gbus] - self.sol['voltage'][self.gbus])
+        self.deltaZ = np.array([np.sum(self.value_esp['theta_esp'][self.slack] - self.sol['theta'][self.slack])])
+
+        self.res = np.concatenate((self.deltaP, self.deltaQ, self.deltaY, self.deltaW, self.deltaZ))
+
+    def active_set(self):
         """
-        Método para cálculo das submatrizes da Jacobiana Expandida
-        :return: Submatrizes
+        Método para cálculo dos elementos da Jacobiana que dependem do conjunto ativo de limites
+        :return: Diagonal cf (nula nos geradores com potência ativa no limite) e elementos eqg (equação de tensão) e
+         wqg (equação de potência reativa) de cada gerador
         """
 
-        self.apg = np.zeros([self.nbus, self.nger])
-        self.bqg = np.zeros([self.nbus, self.nger])
-        self.cpg = np.zeros([self.nger, self.nger])
-        self.cf = np.zeros([self.nger, self.nare])
-        self.eqg = np.zeros([self.nger, self.nbus])
-        self.ft = np.zeros([self.nare, self.nbus])
+        q_fixed = (self.q_state != 0).astype(float)
 
-        ng = 0
-        na = 0
+        return np.where(self.limit_state != 0, 0., self.cf), 1. - q_fixed, q_fixed
 
-        for idx in range(self.nbus):
-            if self.dbar['tipo'][idx].strip() == '':
-                pass
-            else:
-                self.apg[idx, ng] = -1.
-                self.bqg[idx, ng] = -1.
-                self.eqg[ng, idx] = 1.
-                ng += 1
+    def pg_limits(self):
+        """
+        Método para atualização do conjunto ativo de limites de potência ativa de acordo com a frequência atual
+        :return: Potências ativas geradas nos limites e estado de cada gerador (-1: mínimo, 0: livre, 1: máximo)
+        """
 
-                if self.dbar['tipo'][idx].strip() == '2':
-                    self.ft[na, idx] = 1.
-                else:
-                    pass
+        at_min = self.sol['f'] >= self.freq_g['max']
+        at_max = self.sol['f'] <= self.freq_g['min']
 
-        for idy in range(self.nger):
-            self.cpg[idy, idy] = 1.
-            self.cf[idy, na] = 1. / (float(self.dger['est'][idy]) * 1e-2)
+        self.sol['pg'] = np.where(at_min, self.case['pg_min'], np.where(at_max, self.case['pg_max'], self.sol['pg']))
 
-    def calc_res(self):
-        """
-        Método para cálculo dos resíduos
-        :return: Resíduos (deltaP, deltaQ, deltaY, deltaW, deltaZ)
-        """
+        state = at_max.astype(int) - at_min.astype(int)
+        self.events(state, self.limit_state, ('pg_min', 'free', 'pg_max'))
+        self.limit_state = state
 
-        # Vetor de residuos
-        self.deltaP = np.zeros(self.nbus)
-        self.deltaQ = np.zeros(self.nbus)
-        self.deltaY = np.zeros(self.nger)
-        self.deltaW = np.zeros(self.nger)
-        self.deltaZ = np.zeros(self.nare)
+    def q_limits(self):
+        """
+        Método para atualização do conjunto ativo de limites de potência reativa na solução convergida
 
-        ng = 0
-        for idx, value in self.dbar.iterrows():
+        Barras PV com potência reativa fora dos limites passam a PQ com a potência reativa fixa no limite violado e
+        retornam a PV quando a tensão passa para o lado do valor especificado em que o gerador volta a ter margem. Após
+        q_switch_max mudanças de estado o gerador permanece no estado atual (evita oscilação entre PV e PQ)
+        :return: True se algum gerador mudou de estado
+        """
 
-            if value['tipo'].strip() == '':
-                self.deltaP[idx] += self.value_esp['p_esp'][idx]
-                self.deltaP[idx] -= self.calc_p(idx)
+        if not self.qlim:
+            return False
 
-                self.deltaQ[idx] += self.value_esp['q_esp'][idx]
-                self.deltaQ[idx] -= self.calc_q(idx)
-            else:
-                # Cálculo do resíduo DeltaP
-                self.deltaP[idx] += self.sol['pg'][ng]
+        qg = self.sol['qg']
+        v = self.sol['voltage'][self.gbus]
+        v_esp = self.value_esp['v_esp'][self.gbus]
 
-                if value['p_load'].strip() == '':
-                    self.deltaP[idx] -= 0.
-                else:
-                    self.deltaP[idx] -= float(value['p_load']) * self.delta / self.sbase
+        state = self.q_state.copy()
+        free = self.q_state == 0
+        state[free & (qg > self.case['q_max'] + self.q_tol)] = 1
+        state[free & (qg < self.case['q_min'] - self.q_tol)] = -1
+        state[((self.q_state > 0) & (v > v_esp)) | ((self.q_state < 0) & (v < v_esp))] = 0
 
-                self.deltaP[idx] -= self.calc_p(idx)
+        keep = self.slack_gen | (self.q_switches >= self.q_switch_max)
+        state = np.where(keep, self.q_state, state)
 
-                # Cálculo do resíduo DeltaQ
-                self.deltaQ[idx] += self.sol['qg'][ng]
+        changed = state != self.q_state
+        if not np.any(changed):
+            return False
 
-                if value['q_load'].strip() == '':
-                    self.deltaQ[idx] -= 0.
-                else:
-                    self.deltaQ[idx] -= float(value['q_load']) * self.delta / self.sbase
+        self.sol['qg'] = np.where(state > 0, self.case['q_max'], np.where(state < 0, self.case['q_min'], qg))
+        self.q_switches += changed
+        self.events(state, self.q_state, ('qg_min', 'pv', 'qg_max'))
+        self.q_state = state
 
-                self.deltaQ[idx] -= self.calc_q(idx)
+        return True
 
-                # Cálculo do resíduo DeltaY
-                # Tratamento de limite de potência ativa
-                if self.sol['f'] >= self.freq_g['max'][ng] or self.sol['f'] <= self.freq_g['min'][ng]:
-                    self.deltaY[ng] = 0.
-                else:
-                    self.deltaY[ng] += self.value_esp['pg_esp'][ng]
-                    self.deltaY[ng] -= self.sol['pg'][ng]
-                    self.deltaY[ng] -= (1 / (float(self.dger['est'][ng]) * 1e-2)) * (self.sol['f'] - self.fesp)
+    def events(self, state, previous, names):
+        """
+        Método para registro das mudanças de estado dos geradores em relação aos limites
+        :param state: novo estado de cada gerador (-1: mínimo, 0: livre, 1: máximo)
+        :param previous: estado anterior de cada gerador
+        :param names: nomes dos estados mínimo, livre e máximo
+        :return: Eventos adicionados a self.limit_events (e ao trace, se houver)
+        """
 
-                # Cálculo do resíduo DeltaW
-                self.deltaW[ng] += self.value_esp['v_esp'][idx]
-                self.deltaW[ng] -= self.sol['voltage'][idx]
+        for idx in np.flatnonzero(state != previous):
+            event = {
+                'iter': self.iter,
+                'num': int(self.dger['num'][idx]),
+                'limit': names[int(state[idx]) + 1],
+                'f': float(self.sol['f'] * self.fbase)
+            }
+            self.limit_events.append(event)
+            if self.trace is not None:
+                self.trace.emit('limit', **event)
+
+    @contextmanager
+    def timer(self, phase):
+        """
+        Método para medição do tempo de uma etapa (acumulado em self.times)
+        :param phase: nome da etapa
+        """
 
-                if value['tipo'].strip() == '2':
-                    self.deltaZ += self.value_esp['theta_esp'][idx]
-                    self.deltaZ -= self.sol['theta'][idx]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[phase] = self.times.get(phase, 0.) + time.perf_counter() - start
 
-                ng += 1
+    def mismatch(self):
+        """
+        Método para cálculo do resíduo máximo de cada bloco de equações
+        :return: Dicionário com o resíduo máximo (em módulo) dos blocos P, Q, Y, W e Z
+        """
 
-        self.res = np.concatenate((self.deltaP, self.deltaQ, self.deltaY, self.deltaW, self.deltaZ))
+        return {block: float(np.max(np.abs(res), initial=0.)) for block, res in
+                (('P', self.deltaP), ('Q', self.deltaQ), ('Y', self.deltaY), ('W', self.deltaW), ('Z', self.deltaZ))}
 
     def update_state_variables(self):
         """
@@ -367,42 +476,43 @@ class PowerFlowControl:
 
         self.sol['pg'] += self.state_variables[(2 * self.nbus):(2 * self.nbus + self.nger)]
 
-        # Tratamento de limite de potência ativa
-        for idx, value in enumerate(self.sol['pg']):
-            if self.sol['f'] >= self.freq_g['max'][idx]:
-                self.sol['pg'][idx] = float(self.dger['pg_min'][idx]) / self.sbase
-                self.cpg[idx][idx] = np.infty
-
-            elif self.sol['f'] <= self.freq_g['min'][idx]:
-                self.sol['pg'][idx] = float(self.dger['pg_max'][idx]) / self.sbase
-                self.cpg[idx][idx] = np.infty
-
-            else:
-                self.cpg[idx][idx] = 1.
-
         self.sol['qg'] += self.state_variables[(2 * self.nbus + self.nger):(2 * self.nbus + 2 * self.nger)]
 
         self.sol['f'] += self.state_variables[-1]
 
+        # Tratamento de limite de potência ativa com a frequência atualizada
+        self.pg_limits()
+
     def flow(self):
         """
         Método para cálculo do fluxo de potência nas linhas de transmissão
-        :return: Potência ativa e reativa em cada linha de transmissão
+        :return: Potências ativa e reativa nos dois terminais, perdas e carregamento de cada ramo
         """
 
+        de, para, yff, yft, ytf, ytt = self.pi
+        v = self.sol['voltage'] * np.exp(1j * self.sol['theta'])
+
+        # Potências complexas nos terminais de e para de cada ramo (em MVA)
+        s_de = v[de] * np.conj(yff * v[de] + yft * v[para]) * self.sbase
+        s_para = v[para] * np.conj(ytf * v[de] + ytt * v[para]) * self.sbase
+
+        # Carregamento (em %) em relação às capacidades normal e de emergência
+        s_max = np.maximum(np.abs(s_de), np.abs(s_para))
+
         self.power_flow = {
             'de': self.dlin['de'],
             'para': self.dlin['para'],
-            'flow_p': np.zeros(len(self.dlin['de'])),
-            'flow_q': np.zeros(len(self.dlin['de']))
+            'flow_p': s_de.real,
+            'flow_q': s_de.imag,
+            'flow_p_para': s_para.real,
+            'flow_q_para': s_para.imag,
+            'loss_p': s_de.real + s_para.real,
+            'loss_q': s_de.imag + s_para.imag,
+            'loading': s_max / self.capac['norm'] * 1e2,
+            'loading_emerg': s_max / self.capac['emerg'] * 1e2
         }
 
-        for idx, value in self.dlin.iterrows():
-            self.power_flow['flow_p'][idx] += self.calc_p(value['de'] - 1) * self.sbase
-            self.power_flow['flow_p'][idx] -= self.calc_p(value['para'] - 1) * self.sbase
-
-            self.power_flow['flow_q'][idx] += self.calc_q(value['de'] - 1) * self.sbase
-            self.power_flow['flow_q'][idx] -= self.calc_q(value['para'] - 1) * self.sbase
+        return self.power_flow
 
     def result(self, imprime=False):
         """
@@ -411,6 +521,9 @@ class PowerFlowControl:
         :return: Impressão de resultados na tela em forma de tabela
         """
 
+        # Importação sob demanda: a solução sem impressão não depende do plotly
+        import plotly.graph_objects as go
+
         headerColor = 'grey'
         rowEvenColor = 'lightgrey'
         rowOddColor = 'white'
@@ -421,7 +534,7 @@ class PowerFlowControl:
                                                        fill_color=headerColor, align='center',
                                                        font=dict(color='white', size=14)
                                                        ),
-                                           cells=dict(values=[np.arange(start=1, step=1, stop=self.nbus + 1),
+                                           cells=dict(values=[np.asarray(self.dbar['num'], dtype=int),
                                                               np.round(self.sol['voltage'], decimals=3),
                                                               np.round(np.rad2deg(self.sol['theta']), decimals=1)],
                                                       fill_color=[[rowEvenColor, rowOddColor]
@@ -438,14 +551,17 @@ class PowerFlowControl:
             self.flow()
 
             fig = go.Figure(data=[go.Table(header=dict(values=['<b>BARRA DE</b>', '<b>BARRA PARA</b>',
-                                                               '<b>POTÊNCIA ATIVA</b>', '<b>POTÊNCIA REATIVA<b>'],
+                                                               '<b>POTÊNCIA ATIVA</b>', '<b>POTÊNCIA REATIVA<b>',
+                                                               '<b>PERDAS</b>', '<b>CARREGAMENTO (%)</b>'],
                                                        line_color='darkslategray',
                                                        fill_color=headerColor, align='center',
                                                        font=dict(color='white', size=14)
                                                        ),
                                            cells=dict(values=[self.power_flow['de'], self.power_flow['para'],
                                                               np.round(self.power_flow['flow_p'], decimals=2),
-                                                              np.round(self.power_flow['flow_q'], decimals=2)],
+                                                              np.round(self.power_flow['flow_q'], decimals=2),
+                                                              np.round(self.power_flow['loss_p'], decimals=2),
+                                                              np.round(self.power_flow['loading'], decimals=1)],
                                                       fill_color=[[rowEvenColor, rowOddColor]
                                                                   * len(self.power_flow['de'])],
                                                       align='center',
@@ -457,52 +573,268 @@ class PowerFlowControl:
                               font={'family': 'Times New Roman', 'size': 20, 'color': 'grey'})
             fig.show()
 
+    def record(self, refactor):
+        """
+        Método para registro do resíduo máximo por bloco de equações na iteração atual
+        :param refactor: Recebe True se a Jacobiana foi fatorada na iteração
+        :return: Registro adicionado a self.history (e ao trace, se houver)
+        """
+
+        mismatch = self.mismatch()
+        self.history.append(mismatch)
+
+        if self.trace is not None:
+            self.trace.emit('iteration', iter=self.iter, mismatch=mismatch, f=float(self.sol['f'] * self.fbase),
+                            refactor=bool(refactor))
+
     def newton_control(self, imprime=True):
         """
         Método de Newton-Raphson
         :return: Fluxo de potência com Regulação Primária
         """
 
-        # Método de frequências mínima e máxima dos geradores
-        self.freq_ger()
+        # Tempo por etapa medido a cada solução
+        self.times = dict()
+
+        if self.trace is not None:
+            self.trace.emit('start', nbus=self.nbus, nger=self.nger, dim=self.dim, delta=float(self.delta),
+                            iter_max=self.iter_max, tol=self.e, dishonest=self.dishonest)
+
+        with self.timer('setup'):
+            # Método de frequências mínima e máxima dos geradores
+            self.freq_ger()
+
+            # Método de valores especificados
+            self.value_spec()
 
-        # Método de valores especificados
-        self.value_spec()
+            # Método de submatrizes da Jacobiana Expandida
+            if self.jacob is None:
+                self.jacobiana_exp()
 
-        # Método de submatrizes da Jacobiana Expandida
-        self.jacobiana_exp()
+            # Conjunto ativo de limites de potência ativa na solução inicial
+            self.pg_limits()
 
         # Cálculo de resíduos para primeira iteração
-        self.calc_res()
+        with self.timer('residual'):
+            self.calc_res()
+
+        nfact = self.solver.nfact
+        refactor = True
+        self.outer = 1
+        start = self.iter
+
+        self.record(refactor=False)
+
+        while True:
+            if np.max(np.abs(self.res)) <= self.e:
+                # Convergiu: atualiza o conjunto ativo de limites de potência reativa e, caso algum gerador mude de
+                # estado, inicia nova iteração externa a partir da solução atual
+                with self.timer('limits'):
+                    if not self.q_limits():
+                        break
+                with self.timer('residual'):
+                    self.calc_res()
+                self.outer += 1
+                refactor = True
+                start = self.iter
+                continue
 
-        while np.max(np.abs(self.res)) > self.e:
             # Se não convergiu
             # Incrementa contador de iteracoes
             self.iter += 1
 
-            # Atualiza matriz jacobiana
-            self.jacobiana()
+            # Atualiza e fatora matriz jacobiana (no Newton desonesto, apenas se a redução do resíduo estagnar)
+            factorized = refactor or not self.dishonest
+            if factorized:
+                with self.timer('jacobian'):
+                    self.jacobiana()
+                with self.timer('factorization'):
+                    self.solver.factorize(self.jacob)
 
             # Resolve problema de programacao linear
-            self.state_variables = np.linalg.solve(self.jacob, self.res)
+            with self.timer('solve'):
+                self.state_variables = self.solver.solve(self.res)
 
             # Atualiza variaveis de estado
-            self.update_state_variables()
+            with self.timer('limits'):
+                self.update_state_variables()
 
             # Calcula residuos
+            res_max = np.max(np.abs(self.res))
+            with self.timer('residual'):
+                self.calc_res()
+            refactor = np.max(np.abs(self.res)) > self.stall_ratio * res_max
+
+            self.record(refactor=factorized)
+
+            if self.iter - start > self.iter_max:
+                break
+
+        # Número de fatorações da matriz jacobiana
+        self.nfact = self.solver.nfact - nfact
+        self.converged = bool(np.max(np.abs(self.res)) <= self.e)
+        self.method = 'newton'
+
+        if self.trace is not None:
+            self.trace.emit('end', method=self.method, converged=self.converged, iter=self.iter, nfact=self.nfact,
+                            outer=self.outer, f=float(self.sol['f'] * self.fbase), times=dict(self.times))
+
+        if imprime:
+            self.report()
+
+        return self.sol
+
+    def matrix_fd(self, scheme):
+        """
+        Método para montagem das matrizes do método desacoplado rápido aumentadas pelas equações da Regulação Primária
+        :param scheme: versão do método: 'XB' (B' sem resistência) ou 'BX' (B'' sem resistência)
+        :return: Matrizes B' (equações P, Y e Z; variáveis Theta, Pg e f) e B'' (equações Q e W; variáveis V e Qg)
+        """
+
+        ybus = self.ymut if self.ymut is not None else Ybus(self.dbar, self.dlin)
+        n, g = self.nbus, self.nger
+        gen = np.arange(g)
+
+        # B': sem elementos em derivação e sem tap; B'': completa
+        b1 = ybus.calc_b(resist=scheme == 'BX', shunt=False, tap=False)
+        b2 = ybus.calc_b(resist=scheme == 'XB')
+
+        # Submatrizes da Regulação Primária (apg, cpg, cf e ft) e do controle de tensão (bqg, eqg e wqg) de acordo com o
+        # conjunto ativo de limites
+        cf, eqg, wqg = self.active_set()
+        pv = np.flatnonzero(eqg)
+
+        apg = sp.csr_matrix((-np.ones(g), (self.gbus, gen)), shape=(n, g))
+        ft = sp.csr_matrix((np.ones(self.slack.size), (np.zeros(self.slack.size, dtype=int), self.slack)), shape=(1, n))
+        eqg = sp.csr_matrix((np.ones(pv.size), (pv, self.gbus[pv])), shape=(g, n))
+
+        b1 = sp.bmat([[b1, apg, None], [None, sp.identity(g), sp.csr_matrix(cf[:, None])], [ft, None, None]],
+                     format='csr')
+        b2 = sp.bmat([[b2, apg], [eqg, sp.diags(wqg)]], format='csr')
+        b1.sort_indices()
+        b2.sort_indices()
+
+        return b1, b2
+
+    def decoupled_control(self, scheme='XB', imprime=True):
+        """
+        Método desacoplado rápido com Regulação Primária: meia iteração P-Theta (com as equações de frequência e
+        potência ativa gerada) e meia iteração Q-V com matrizes constantes. Retorna ao método de Newton-Raphson, a
+        partir da solução inicial, caso não convirja em iter_max_fd iterações
+        :param scheme: versão do método: 'XB' ou 'BX' -> Default: 'XB'
+        :param imprime: Recebe True (para imprimir) ou False -> Default: True
+        :return: Fluxo de potência com Regulação Primária
+        """
+
+        sol = {key: np.copy(value) for key, value in self.sol.items()}
+
+        self.times = dict()
+
+        if self.trace is not None:
+            self.trace.emit('start', nbus=self.nbus, nger=self.nger, dim=self.dim, delta=float(self.delta),
+                            iter_max=self.iter_max_fd, tol=self.e, method='decoupled', scheme=scheme)
+
+        with self.timer('setup'):
+            self.freq_ger()
+            self.value_spec()
+            self.cf = 1. / self.case['est']
+            self.pg_limits()
+
+        with self.timer('residual'):
             self.calc_res()
 
-            if self.iter > self.iter_max:
+        n, g = self.nbus, self.nger
+        solver_p, solver_q = SparseLUSolver(), SparseLUSolver()
+        state = None
+        self.outer = 1
+
+        self.record(refactor=False)
+
+        while True:
+            if np.max(np.abs(self.res)) <= self.e:
+                # Convergiu: atualiza o conjunto ativo de limites de potência reativa (nova iteração externa)
+                with self.timer('limits'):
+                    if not self.q_limits():
+                        break
+                with self.timer('residual'):
+                    self.calc_res()
+                self.outer += 1
+                continue
+
+            self.iter += 1
+
+            # Fatoração de B' e B'' (novamente apenas após mudança do conjunto ativo de limites)
+            active = np.concatenate((self.limit_state, self.q_state))
+            refactor = state is None or np.any(state != active)
+            if refactor:
+                with self.timer('factorization'):
+                    b1, b2 = self.matrix_fd(scheme)
+                    solver_p.factorize(b1)
+                    solver_q.factorize(b2)
+                state = active
+
+            # Meia iteração P-Theta: Theta, Pg e f
+            with self.timer('solve'):
+                dx = solver_p.solve(np.concatenate((self.deltaP / self.sol['voltage'], self.deltaY, self.deltaZ)))
+            self.state_variables = np.concatenate((dx[:n], np.zeros(n), dx[n:n + g], np.zeros(g), dx[n + g:]))
+
+            with self.timer('limits'):
+                self.update_state_variables()
+            with self.timer('residual'):
+                self.calc_res()
+
+            # Meia iteração Q-V: V e Qg
+            with self.timer('solve'):
+                dx = solver_q.solve(np.concatenate((self.deltaQ / self.sol['voltage'], self.deltaW)))
+            self.state_variables = np.concatenate((np.zeros(n), dx[:n], np.zeros(g), dx[n:], np.zeros(self.nare)))
+
+            with self.timer('limits'):
+                self.update_state_variables()
+            with self.timer('residual'):
+                self.calc_res()
+
+            self.record(refactor=refactor)
+
+            if not np.all(np.isfinite(self.res)) or self.iter >= self.iter_max_fd:
                 break
 
+        self.nfact = solver_p.nfact + solver_q.nfact
+        self.converged = bool(np.max(np.abs(self.res)) <= self.e)
+
+        if not self.converged:
+            # Retorno ao método de Newton-Raphson a partir da solução inicial
+            self.iter_fd = self.iter
+            self.iter = 0
+            self.sol = sol
+            self.limit_state = np.zeros(self.nger, dtype=int)
+            self.q_state = np.zeros(self.nger, dtype=int)
+            self.q_switches = np.zeros(self.nger, dtype=int)
+            self.newton_control(imprime=imprime)
+            self.method = 'decoupled -> newton'
+            return self.sol
+
+        self.method = 'decoupled'
+
+        if self.trace is not None:
+            self.trace.emit('end', method=self.method, converged=self.converged, iter=self.iter, nfact=self.nfact,
+                            outer=self.outer, f=float(self.sol['f'] * self.fbase), times=dict(self.times))
+
         if imprime:
-            self.result(imprime=True)
-            print('-------------------------------------------------------------------------------------------------\n')
-            print(f"FREQUÊNCIA DO SISTEMA: {round(self.sol['f'] * self.fbase, 3)}Hz\n")
-            print('-------------------------------------------------------------------------------------------------\n')
-            print('BARRA     PG (MW)     QG (Mvar)')
-            for idx, value in self.dger.iterrows():
-                print(f"{value['num']:2.0f}         {(self.sol['pg'][idx] * self.sbase):3.2f}       "
-                      f"{(self.sol['qg'][idx] * self.sbase):3.2f}")
+            self.report()
 
         return self.sol
+
+    def report(self):
+        """
+        Método para impressão dos resultados (tabelas, frequência do sistema e potências geradas)
+        :return: Impressão de resultados na tela
+        """
+
+        self.result(imprime=True)
+        print('-------------------------------------------------------------------------------------------------\n')
+        print(f"FREQUÊNCIA DO SISTEMA: {round(self.sol['f'] * self.fbase, 3)}Hz\n")
+        print(f"ITERAÇÕES: {self.iter}     FATORAÇÕES: {self.nfact}     ITERAÇÕES EXTERNAS: {self.outer}\n")
+        print('-------------------------------------------------------------------------------------------------\n')
+        print('BARRA     PG (MW)     QG (Mvar)')
+        for num, pg, qg in zip(self.dger['num'], self.sol['pg'], self.sol['qg']):
+            print(f"{num:2.0f}         {(pg * self.sbase):3.2f}       {(qg * self.sbase):3.2f}")
@@ -1,5 +1,97 @@
-import pandas as pd
-import sys
+import numpy as np
+
+from case import Block
+
+
+class PWFError(Exception):
+    """
+    Exceção para erros de leitura do arquivo de dados elétricos
+    """
+
+
+# Especificação das colunas de cada bloco: (campo, coluna inicial, coluna final, tipo, valor default)
+# Tipos: 'i' -> inteiro, 'f' -> float, 's' -> texto. Campos em branco recebem o valor default
+DBAR = (
+    ('num', 0, 5, 'i', 0),
+    ('oper', 5, 6, 's', ''),
+    ('estado', 6, 7, 's', ''),
+    ('tipo', 7, 8, 'i', 0),
+    ('base_tensao', 8, 10, 's', ''),
+    ('nome', 10, 22, 's', ''),
+    ('lim_tensao', 22, 24, 's', ''),
+    ('tensao', 24, 28, 'f', 1000.),
+    ('angulo', 28, 32, 'f', 0.),
+    ('p', 32, 37, 'f', 0.),
+    ('q', 37, 42, 'f', 0.),
+    ('q_min', 42, 47, 'f', -9999.),
+    ('q_max', 47, 52, 'f', 99999.),
+    ('bar_control', 52, 58, 'i', 0),
+    ('p_load', 58, 63, 'f', 0.),
+    ('q_load', 63, 68, 'f', 0.),
+    ('capac_reat', 68, 73, 'f', 0.),
+    ('area', 73, 76, 'i', 1),
+    ('tensao_load', 76, 80, 'f', 0.),
+    ('modo', 80, 81, 's', ''),
+    ('agreg1', 81, 84, 's', ''),
+    ('agreg2', 84, 87, 's', ''),
+    ('agreg3', 87, 90, 's', ''),
+    ('agreg4', 90, 93, 's', ''),
+    ('agreg5', 93, 96, 's', ''),
+    ('agreg6', 96, 99, 's', ''),
+    ('agreg7', 99, 102, 's', ''),
+    ('agreg8', 102, 105, 's', ''),
+    ('agreg9', 105, 108, 's', ''),
+    ('agreg10', 108, 111, 's', ''),
+)
+
+DLIN = (
+    ('de', 0, 5, 'i', 0),
+    ('abert_de', 5, 6, 's', ''),
+    ('oper', 7, 8, 's', ''),
+    ('abert_para', 9, 10, 's', ''),
+    ('para', 10, 15, 'i', 0),
+    ('circ', 15, 17, 'i', 1),
+    ('estado', 17, 18, 's', ''),
+    ('prop', 18, 19, 's', ''),
+    ('resist', 20, 26, 'f', 0.),
+    ('reat', 26, 32, 'f', 0.),
+    ('suscep', 32, 38, 'f', 0.),
+    ('tap', 38, 43, 'f', 1.),
+    ('tap_min', 43, 48, 'f', 0.),
+    ('tap_max', 48, 53, 'f', 0.),
+    ('defasagem', 53, 58, 'f', 0.),
+    ('barra_control', 58, 64, 'i', 0),
+    ('capac_norm', 64, 68, 'f', 9999.),
+    ('capac_emerg', 68, 72, 'f', 9999.),
+    ('num_taps', 72, 74, 'i', 0),
+    ('capac_equip', 74, 78, 'f', 9999.),
+    ('agreg1', 78, 81, 's', ''),
+    ('agreg2', 81, 84, 's', ''),
+    ('agreg3', 84, 87, 's', ''),
+    ('agreg4', 87, 90, 's', ''),
+    ('agreg5', 90, 93, 's', ''),
+    ('agreg6', 93, 96, 's', ''),
+    ('agreg7', 96, 99, 's', ''),
+    ('agreg8', 99, 102, 's', ''),
+    ('agreg9', 102, 105, 's', ''),
+    ('agreg10', 105, 108, 's', ''),
+)
+
+DGER = (
+    ('num', 0, 5, 'i', 0),
+    ('oper', 6, 7, 's', ''),
+    ('pg_min', 8, 14, 'f', 0.),
+    ('pg_max', 15, 21, 'f', 99999.),
+    ('fp', 22, 27, 'f', 0.),
+    ('fpcr', 28, 33, 'f', 0.),
+    ('fpn', 34, 39, 'f', 0.),
+    ('fs_ia', 40, 44, 'f', 0.),
+    ('fs_if', 45, 49, 'f', 0.),
+    ('ang_load', 50, 54, 'f', 0.),
+    ('reat_maq', 55, 60, 'f', 0.),
+    ('s_nom', 61, 66, 'f', 0.),
+    ('est', 66, 72, 'f', 5.),
+)
 
 
 class ReadFile:
@@ -12,87 +104,17 @@ class ReadFile:
         self.titu = dict()
         self.titu['titu'] = list()
 
-        # Bloco dbar:
+        # Especificação das colunas dos blocos de dados
+        self.spec = {
+            'DBAR': DBAR,
+            'DLIN': DLIN,
+            'DGER': DGER
+        }
+
+        # Blocos dbar, dlin e dger: arrays tipados (campos de texto decodificados sob demanda)
         self.dbar = dict()
-        self.dbar['num'] = list()
-        self.dbar['oper'] = list()
-        self.dbar['estado'] = list()
-        self.dbar['tipo'] = list()
-        self.dbar['base_tensao'] = list()
-        self.dbar['nome'] = list()
-        self.dbar['lim_tensao'] = list()
-        self.dbar['tensao'] = list()
-        self.dbar['angulo'] = list()
-        self.dbar['p'] = list()
-        self.dbar['q'] = list()
-        self.dbar['q_min'] = list()
-        self.dbar['q_max'] = list()
-        self.dbar['bar_control'] = list()
-        self.dbar['p_load'] = list()
-        self.dbar['q_load'] = list()
-        self.dbar['capac_reat'] = list()
-        self.dbar['area'] = list()
-        self.dbar['tensao_load'] = list()
-        self.dbar['modo'] = list()
-        self.dbar['agreg1'] = list()
-        self.dbar['agreg2'] = list()
-        self.dbar['agreg3'] = list()
-        self.dbar['agreg4'] = list()
-        self.dbar['agreg5'] = list()
-        self.dbar['agreg6'] = list()
-        self.dbar['agreg7'] = list()
-        self.dbar['agreg8'] = list()
-        self.dbar['agreg9'] = list()
-        self.dbar['agreg10'] = list()
-
-        # Bloco dlin:
         self.dlin = dict()
-        self.dlin['de'] = list()
-        self.dlin['abert_de'] = list()
-        self.dlin['oper'] = list()
-        self.dlin['abert_para'] = list()
-        self.dlin['para'] = list()
-        self.dlin['circ'] = list()
-        self.dlin['estado'] = list()
-        self.dlin['prop'] = list()
-        self.dlin['resist'] = list()
-        self.dlin['reat'] = list()
-        self.dlin['suscep'] = list()
-        self.dlin['tap'] = list()
-        self.dlin['tap_min'] = list()
-        self.dlin['tap_max'] = list()
-        self.dlin['defasagem'] = list()
-        self.dlin['barra_control'] = list()
-        self.dlin['capac_norm'] = list()
-        self.dlin['capac_emerg'] = list()
-        self.dlin['num_taps'] = list()
-        self.dlin['capac_equip'] = list()
-        self.dlin['agreg1'] = list()
-        self.dlin['agreg2'] = list()
-        self.dlin['agreg3'] = list()
-        self.dlin['agreg4'] = list()
-        self.dlin['agreg5'] = list()
-        self.dlin['agreg6'] = list()
-        self.dlin['agreg7'] = list()
-        self.dlin['agreg8'] = list()
-        self.dlin['agreg9'] = list()
-        self.dlin['agreg10'] = list()
-
-        # Bloco dger:
         self.dger = dict()
-        self.dger['num'] = list()
-        self.dger['oper'] = list()
-        self.dger['pg_min'] = list()
-        self.dger['pg_max'] = list()
-        self.dger['fp'] = list()
-        self.dger['fpcr'] = list()
-        self.dger['fpn'] = list()
-        self.dger['fs_ia'] = list()
-        self.dger['fs_if'] = list()
-        self.dger['ang_load'] = list()
-        self.dger['reat_maq'] = list()
-        self.dger['s_nom'] = list()
-        self.dger['est'] = list()
 
         # Line counter
         self.count = 0
@@ -102,130 +124,107 @@ class ReadFile:
         self.end_block = ('9999', '99999')
         self.comment = '('
 
-    def read_file(self, file: str):
+    def read_file(self, file: str, frames=True):
         """
         Método para leitura do arquivo de dados elétricos
         :param file: caminho do arquivo de dados elétricos
-        :return: DataFrame contendo os dados dos blocos dbar e dlin
+        :param frames: Recebe True (DataFrames) ou False (blocos compactos, sem importar o pandas) -> Default: True
+        :return: DataFrame contendo os dados dos blocos dbar, dlin e dger
         """
 
-        f = open(f'{file}', 'r', encoding='latin-1')
-        self.lines = f.readlines()
-        f.close()
-
-        while self.lines[self.count].strip() != self.end:
-
-            if self.lines[self.count].strip() == 'TITU':
-                self.count += 1
-                self.titu['titu'].append(self.lines[self.count])
-
-            elif self.lines[self.count].strip() == 'DBAR':
-                self.count += 1
-                while self.lines[self.count].strip() not in self.end_block:
-                    if self.lines[self.count][0] == self.comment:
-                        pass
-                    else:
-                        self.dbar['num'].append(self.lines[self.count][:5])
-                        self.dbar['oper'].append(self.lines[self.count][5])
-                        self.dbar['estado'].append(self.lines[self.count][6])
-                        self.dbar['tipo'].append(self.lines[self.count][7])
-                        self.dbar['base_tensao'].append(self.lines[self.count][8:10])
-                        self.dbar['nome'].append(self.lines[self.count][10:22])
-                        self.dbar['lim_tensao'].append(self.lines[self.count][22:24])
-                        self.dbar['tensao'].append(self.lines[self.count][24:28])
-                        self.dbar['angulo'].append(self.lines[self.count][28:32])
-                        self.dbar['p'].append(self.lines[self.count][32:37])
-                        self.dbar['q'].append(self.lines[self.count][37:42])
-                        self.dbar['q_min'].append(self.lines[self.count][42:47])
-                        self.dbar['q_max'].append(self.lines[self.count][47:52])
-                        self.dbar['bar_control'].append(self.lines[self.count][52:58])
-                        self.dbar['p_load'].append(self.lines[self.count][58:63])
-                        self.dbar['q_load'].append(self.lines[self.count][63:68])
-                        self.dbar['capac_reat'].append(self.lines[self.count][68:73])
-                        self.dbar['area'].append(self.lines[self.count][73:76])
-                        self.dbar['tensao_load'].append(self.lines[self.count][76:80])
-                        self.dbar['modo'].append(self.lines[self.count][80])
-                        self.dbar['agreg1'].append(self.lines[self.count][81:84])
-                        self.dbar['agreg2'].append(self.lines[self.count][84:87])
-                        self.dbar['agreg3'].append(self.lines[self.count][87:90])
-                        self.dbar['agreg4'].append(self.lines[self.count][90:93])
-                        self.dbar['agreg5'].append(self.lines[self.count][93:96])
-                        self.dbar['agreg6'].append(self.lines[self.count][96:99])
-                        self.dbar['agreg7'].append(self.lines[self.count][99:102])
-                        self.dbar['agreg8'].append(self.lines[self.count][102:105])
-                        self.dbar['agreg9'].append(self.lines[self.count][105:108])
-                        self.dbar['agreg10'].append(self.lines[self.count][108:111])
-                    self.count += 1
-
-            elif self.lines[self.count].strip() == 'DLIN':
-                self.count += 1
-                while self.lines[self.count].strip() not in self.end_block:
-                    if self.lines[self.count][0] == self.comment:
-                        pass
-                    else:
-                        self.dlin['de'].append(self.lines[self.count][:5])
-                        self.dlin['abert_de'].append(self.lines[self.count][5])
-                        self.dlin['oper'].append(self.lines[self.count][7])
-                        self.dlin['abert_para'].append(self.lines[self.count][9])
-                        self.dlin['para'].append(self.lines[self.count][10:15])
-                        self.dlin['circ'].append(self.lines[self.count][15:17])
-                        self.dlin['estado'].append(self.lines[self.count][17])
-                        self.dlin['prop'].append(self.lines[self.count][18])
-                        self.dlin['resist'].append(self.lines[self.count][20:26])
-                        self.dlin['reat'].append(self.lines[self.count][26:32])
-                        self.dlin['suscep'].append(self.lines[self.count][32:38])
-                        self.dlin['tap'].append(self.lines[self.count][38:43])
-                        self.dlin['tap_min'].append(self.lines[self.count][43:48])
-                        self.dlin['tap_max'].append(self.lines[self.count][48:53])
-                        self.dlin['defasagem'].append(self.lines[self.count][53:58])
-                        self.dlin['barra_control'].append(self.lines[self.count][58:64])
-                        self.dlin['capac_norm'].append(self.lines[self.count][64:68])
-                        self.dlin['capac_emerg'].append(self.lines[self.count][68:72])
-                        self.dlin['num_taps'].append(self.lines[self.count][72:74])
-                        self.dlin['capac_equip'].append(self.lines[self.count][74:78])
-                        self.dlin['agreg1'].append(self.lines[self.count][78:81])
-                        self.dlin['agreg2'].append(self.lines[self.count][81:84])
-                        self.dlin['agreg3'].append(self.lines[self.count][84:87])
-                        self.dlin['agreg4'].append(self.lines[self.count][87:90])
-                        self.dlin['agreg5'].append(self.lines[self.count][90:93])
-                        self.dlin['agreg6'].append(self.lines[self.count][93:96])
-                        self.dlin['agreg7'].append(self.lines[self.count][96:99])
-                        self.dlin['agreg8'].append(self.lines[self.count][99:102])
-                        self.dlin['agreg9'].append(self.lines[self.count][102:105])
-                        self.dlin['agreg10'].append(self.lines[self.count][105:108])
-                    self.count += 1
-
-            elif self.lines[self.count].strip() == 'DGER':
-                self.count += 1
-                while self.lines[self.count].strip() not in self.end_block:
-                    if self.lines[self.count][0] == self.comment:
-                        pass
-                    else:
-                        self.dger['num'].append(self.lines[self.count][:5])
-                        self.dger['oper'].append(self.lines[self.count][6])
-                        self.dger['pg_min'].append(self.lines[self.count][8:14])
-                        self.dger['pg_max'].append(self.lines[self.count][15:21])
-                        self.dger['fp'].append(self.lines[self.count][22:27])
-                        self.dger['fpcr'].append(self.lines[self.count][28:33])
-                        self.dger['fpn'].append(self.lines[self.count][34:39])
-                        self.dger['fs_ia'].append(self.lines[self.count][40:44])
-                        self.dger['fs_if'].append(self.lines[self.count][45:49])
-                        self.dger['ang_load'].append(self.lines[self.count][50:54])
-                        self.dger['reat_maq'].append(self.lines[self.count][55:60])
-                        self.dger['s_nom'].append(self.lines[self.count][61:66])
-                        self.dger['est'].append(self.lines[self.count][66:72])
-                    self.count += 1
-
-            self.count += 1
-
-        self.dbar_df = pd.DataFrame(data=self.dbar, dtype=float)
-        self.dlin_df = pd.DataFrame(data=self.dlin, dtype=float)
-        self.dger_df = pd.DataFrame(data=self.dger, dtype=float)
-
-        if self.dbar_df.empty or self.dlin_df.empty:
-            print("File reading not done!")
-            sys.exit()
-        else:
-            print("File read successfully!")
+        # Registros (e número da linha no arquivo) de cada bloco
+        lines = {block: list() for block in self.spec}
+        numbers = {block: list() for block in self.spec}
+
+        block = None
+        titu = False
+
+        with open(f'{file}', 'r', encoding='latin-1') as f:
+            for self.count, line in enumerate(f, start=1):
+                line = line.rstrip('\r\n')
+                keyword = line.strip()
+
+                if titu:
+                    self.titu['titu'].append(line)
+                    titu = False
+
+                elif block is None:
+                    if keyword == self.end:
+                        break
+                    elif keyword == 'TITU':
+                        titu = True
+                    elif keyword in self.spec:
+                        block = keyword
+
+                elif keyword in self.end_block:
+                    block = None
+
+                elif keyword != '' and line[0] != self.comment:
+                    lines[block].append(line)
+                    numbers[block].append(self.count)
+
+            else:
+                raise PWFError(f"{file}: código {self.end} não encontrado")
+
+        self.dbar = self.decode(file, 'DBAR', lines['DBAR'], numbers['DBAR'])
+        self.dlin = self.decode(file, 'DLIN', lines['DLIN'], numbers['DLIN'])
+        self.dger = self.decode(file, 'DGER', lines['DGER'], numbers['DGER'])
+
+        if self.dbar['num'].size == 0 or self.dlin['de'].size == 0:
+            raise PWFError(f"{file}: blocos DBAR e DLIN são obrigatórios")
+
+        if not frames:
+            return self.dbar, self.dlin, self.dger
+
+        self.dbar_df = self.dbar.to_frame()
+        self.dlin_df = self.dlin.to_frame()
+        self.dger_df = self.dger.to_frame()
 
         return self.dbar_df, self.dlin_df, self.dger_df
+
+    def decode(self, file, block, lines, numbers):
+        """
+        Método para conversão em bloco dos registros de formato fixo
+        :param file: caminho do arquivo de dados elétricos (mensagens de erro)
+        :param block: nome do bloco (DBAR, DLIN ou DGER)
+        :param lines: registros do bloco
+        :param numbers: número da linha de cada registro no arquivo
+        :return: Block com um array tipado por campo (campos de texto não decodificados)
+        """
+
+        spec = self.spec[block]
+        width = max(end for _, _, end, _, _ in spec)
+
+        # Matriz de caracteres (um registro por linha, completado com espaços)
+        raw = np.frombuffer(''.join(line[:width].ljust(width) for line in lines).encode('latin-1'),
+                            dtype='S1').reshape(len(lines), width)
+
+        data = dict()
+        text = dict()
+
+        for name, start, end, kind, default in spec:
+            field = np.ascontiguousarray(raw[:, start:end]).view(f'S{end - start}').ravel()
+
+            if kind == 's':
+                # Campos de texto (metadados): decodificados somente quando acessados
+                data[name] = text[name] = field
+                continue
+
+            blank = (raw[:, start:end] == b' ').all(axis=1)
+            field[blank] = b'0'
+
+            try:
+                values = field.astype(float)
+            except ValueError:
+                for idx, value in enumerate(field):
+                    try:
+                        float(value)
+                    except ValueError:
+                        raise PWFError(f"{file}, linha {numbers[idx]}: campo {name} do bloco {block} inválido "
+                                       f"({value.decode('latin-1')!r})") from None
+                raise
+
+            values[blank] = default
+            data[name] = values.astype(int) if kind == 'i' else values
+
+        return Block(data, text)
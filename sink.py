@@ -0,0 +1,196 @@
+import glob
+import json
+import os
+
+import numpy as np
+
+# Campos gravados por execução: escalares e arrays por barra, ramo e gerador
+SCALARS = ('run', 'delta', 'f', 'iter', 'converged')
+FIELDS = {
+    'bus': ('voltage', 'theta'),
+    'branch': ('flow_p', 'flow_q', 'flow_p_para', 'flow_q_para'),
+    'gen': ('pg', 'qg')
+}
+
+
+class ResultSink:
+    """
+    Classe para gravação contínua dos resultados de várias execuções do fluxo de potência em arquivos colunares
+
+    Os resultados são acumulados em buffers de tamanho fixo e gravados em blocos (arquivos .npz compactados ou
+    Parquet) sempre que o buffer enche, de modo que a memória utilizada não depende do número de execuções. Cada bloco
+    é um arquivo novo no diretório de saída (gravação apenas por acréscimo)
+    """
+
+    def __init__(self, folder, buffer=256, fmt='npz', prefix='part'):
+        """
+        :param folder: diretório de saída
+        :param buffer: número de execuções por bloco
+        :param fmt: formato dos blocos: 'npz' (numpy compactado) ou 'parquet' (requer pyarrow)
+        :param prefix: prefixo dos arquivos (processos diferentes devem usar prefixos diferentes)
+        """
+
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Formato 'parquet' requer o pacote pyarrow") from None
+        elif fmt != 'npz':
+            raise ValueError(f"Formato {fmt!r} inválido: utilize 'npz' ou 'parquet'")
+
+        self.folder = folder
+        self.buffer = buffer
+        self.fmt = fmt
+        self.prefix = prefix
+
+        os.makedirs(folder, exist_ok=True)
+
+        # Blocos gravados, execuções no buffer e total de execuções
+        self.chunk = 0
+        self.size = 0
+        self.count = 0
+        self.data = None
+
+    def allocate(self, pf):
+        """
+        Método para alocação dos buffers e gravação dos metadados (numeração de barras, ramos e geradores)
+        :param pf: objeto PowerFlowControl da primeira execução
+        :return: Buffers alocados
+        """
+
+        self.dim = {'bus': pf.nbus, 'branch': len(pf.dlin['de']), 'gen': pf.nger}
+
+        self.data = {name: np.zeros(self.buffer, dtype=float) for name in SCALARS}
+        self.data['run'] = np.zeros(self.buffer, dtype=np.int64)
+        self.data['iter'] = np.zeros(self.buffer, dtype=np.int64)
+        self.data['converged'] = np.zeros(self.buffer, dtype=bool)
+        for kind, names in FIELDS.items():
+            for name in names:
+                self.data[name] = np.zeros((self.buffer, self.dim[kind]), dtype=float)
+
+        meta = {
+            'fmt': self.fmt,
+            'bus': [int(num) for num in pf.dbar['num']],
+            'branch': [[int(de), int(para), int(circ)] for de, para, circ in
+                       zip(pf.dlin['de'], pf.dlin['para'], pf.dlin['circ'])],
+            'gen': [int(num) for num in pf.dger['num']],
+            'scalars': list(SCALARS),
+            'fields': FIELDS
+        }
+
+        path = os.path.join(self.folder, 'meta.json')
+        if not os.path.isfile(path):
+            with open(path, 'w') as f:
+                json.dump(meta, f)
+
+    def append(self, pf, run=None):
+        """
+        Método para inclusão dos resultados de uma execução
+        :param pf: objeto PowerFlowControl após newton_control
+        :param run: identificador da execução -> Default: contador de execuções do objeto
+        :return: Resultados no buffer (bloco gravado se o buffer estiver cheio)
+        """
+
+        if self.data is None:
+            self.allocate(pf)
+
+        flow = pf.flow()
+        idx = self.size
+
+        self.data['run'][idx] = self.count if run is None else run
+        self.data['delta'][idx] = (pf.delta - 1) * 1e2
+        self.data['f'][idx] = pf.sol['f'] * pf.fbase
+        self.data['iter'][idx] = pf.iter
+        self.data['converged'][idx] = pf.converged
+
+        self.data['voltage'][idx] = pf.sol['voltage']
+        self.data['theta'][idx] = np.degrees(pf.sol['theta'])
+        self.data['pg'][idx] = pf.sol['pg'] * pf.sbase
+        self.data['qg'][idx] = pf.sol['qg'] * pf.sbase
+        for name in FIELDS['branch']:
+            self.data[name][idx] = flow[name]
+
+        self.size += 1
+        self.count += 1
+
+        if self.size == self.buffer:
+            self.flush()
+
+    def flush(self):
+        """
+        Método para gravação do buffer em um novo bloco
+        :return: Arquivo do bloco gravado no diretório de saída
+        """
+
+        if not self.size:
+            return
+
+        data = {name: values[:self.size] for name, values in self.data.items()}
+        path = os.path.join(self.folder, f'{self.prefix}-{self.chunk:06d}.{self.fmt}')
+
+        # Grava em arquivo temporário e renomeia (leitura simultânea de blocos completos)
+        tmp = f'{path}.tmp'
+        if self.fmt == 'npz':
+            with open(tmp, 'wb') as f:
+                np.savez_compressed(f, **data)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            columns = {name: data[name] for name in SCALARS}
+            for kind, names in FIELDS.items():
+                for name in names:
+                    for col in range(self.dim[kind]):
+                        columns[f'{name}_{col}'] = data[name][:, col]
+            pq.write_table(pa.table(columns), tmp, compression='zstd')
+        os.replace(tmp, path)
+
+        self.chunk += 1
+        self.size = 0
+
+    def close(self):
+        """
+        Método para encerramento da gravação
+        :return: Execuções restantes no buffer gravadas
+        """
+
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_results(folder, names=None):
+    """
+    Método para leitura dos blocos gravados por ResultSink (um bloco por vez)
+    :param folder: diretório de saída
+    :param names: campos a serem lidos -> Default: todos
+    :return: Gerador de dicionários com os arrays de cada bloco
+    """
+
+    with open(os.path.join(folder, 'meta.json'), 'r') as f:
+        meta = json.load(f)
+
+    names = list(meta['scalars']) + [name for group in meta['fields'].values() for name in group] \
+        if names is None else names
+
+    for path in sorted(glob.glob(os.path.join(folder, f"*.{meta['fmt']}"))):
+        if meta['fmt'] == 'npz':
+            with np.load(path) as chunk:
+                yield {name: chunk[name] for name in names}
+        else:
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(path)
+            chunk = dict()
+            for name in names:
+                if name in meta['scalars']:
+                    chunk[name] = table.column(name).to_numpy()
+                else:
+                    kind = next(kind for kind, group in meta['fields'].items() if name in group)
+                    chunk[name] = np.column_stack([table.column(f'{name}_{col}').to_numpy()
+                                                   for col in range(len(meta[kind]))])
+            yield chunk
@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from power_flow_gov import PowerFlowControl
+from sink import ResultSink
+
+# Caso compartilhado pelos processos (dbar, dlin, dger, ybus) e diretório de gravação dos resultados completos
+_case = None
+_folder = None
+
+
+def _init(dbar, dlin, dger, ybus, folder=None):
+    """
+    Método de inicialização dos processos: armazena o caso uma única vez por processo
+    """
+
+    global _case, _folder
+    _case = (dbar, dlin, dger, ybus)
+    _folder = folder
+
+
+def _solve_chunk(deltas, part=0, runs=None):
+    """
+    Método para solução de um bloco de variações de carga (em ordem crescente)
+    :param deltas: variações de carga do bloco
+    :param part: índice do bloco (prefixo dos arquivos de resultados)
+    :param runs: posição de cada variação de carga na lista original (identificador nos arquivos de resultados)
+    :return: Lista com frequência, potências geradas, iterações, convergência e carregamento máximo de cada solução
+    """
+
+    results = list()
+    sol = None
+    sink = ResultSink(_folder, prefix=f'part{part:04d}') if _folder else None
+
+    for idx, delta in enumerate(deltas):
+        # Partida a quente a partir da última solução convergida do bloco
+        pf = PowerFlowControl(*_case, delta, sol=sol)
+        pf.newton_control(imprime=False)
+
+        if pf.converged:
+            sol = pf.sol
+
+        if sink is not None:
+            sink.append(pf, run=idx if runs is None else runs[idx])
+
+        results.append((pf.sol['f'] * pf.fbase, pf.sol['pg'] * pf.sbase, pf.sol['qg'] * pf.sbase, pf.iter,
+                        pf.converged, np.max(pf.flow()['loading'])))
+
+    if sink is not None:
+        sink.close()
+
+    return results
+
+
+class LoadSweep:
+    """
+    Classe para solução do fluxo de potência com Regulação Primária para um conjunto de variações de carga
+    """
+
+    def __init__(self, dbar, dlin, dger, ybus, workers=None):
+        self.dbar = dbar
+        self.dlin = dlin
+        self.dger = dger
+        self.ybus = ybus
+
+        # Número de processos (1 -> solução no próprio processo)
+        self.workers = os.cpu_count() if workers is None else workers
+
+    def run(self, deltas, folder=None):
+        """
+        Método para solução das variações de carga
+        :param deltas: variações de carga (em %) aplicadas em todas as barras do sistema
+        :param folder: diretório para gravação dos resultados completos (ver sink.ResultSink) -> Default: não grava
+        :return: DataFrame com frequência, potências geradas, iterações, convergência e carregamento máximo de cada
+         variação de carga
+        """
+
+        import pandas as pd
+
+        deltas = np.asarray(deltas, dtype=float)
+
+        # Blocos contíguos de variações ordenadas: soluções vizinhas no mesmo processo
+        order = np.argsort(deltas)
+        runs = [chunk for chunk in np.array_split(order, max(1, min(self.workers, deltas.size))) if chunk.size]
+        chunks = [deltas[chunk] for chunk in runs]
+        parts = range(len(chunks))
+
+        if self.workers == 1:
+            _init(self.dbar, self.dlin, self.dger, self.ybus, folder)
+            results = [_solve_chunk(*args) for args in zip(chunks, parts, runs)]
+        else:
+            with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init,
+                                     initargs=(self.dbar, self.dlin, self.dger, self.ybus, folder)) as pool:
+                results = list(pool.map(_solve_chunk, chunks, parts, runs))
+
+        results = [result for chunk in results for result in chunk]
+
+        # Tabela na ordem original das variações de carga
+        rank = np.argsort(order)
+        pg = np.array([result[1] for result in results])[rank]
+        qg = np.array([result[2] for result in results])[rank]
+
+        table = {
+            'deltaLoad': deltas,
+            'f': np.array([result[0] for result in results])[rank],
+            'iter': np.array([result[3] for result in results])[rank],
+            'converged': np.array([result[4] for result in results])[rank],
+            'loading_max': np.array([result[5] for result in results])[rank]
+        }
+
+        for idx, num in enumerate(self.dger['num']):
+            table[f'pg_{num}'] = pg[:, idx]
+        for idx, num in enumerate(self.dger['num']):
+            table[f'qg_{num}'] = qg[:, idx]
+
+        return pd.DataFrame(data=table)
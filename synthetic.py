@@ -0,0 +1,120 @@
+import numpy as np
+
+from read_file import DBAR, DGER, DLIN
+
+
+def field(value, width):
+    """
+    Método para formatação de um valor numérico em um campo de largura fixa
+    :param value: valor do campo
+    :param width: largura do campo (em caracteres)
+    :return: Texto alinhado à direita com o maior número de casas decimais que cabe no campo
+    """
+
+    if isinstance(value, (int, np.integer)):
+        return f'{value:>{width}d}'
+
+    for text in [f'{value:.{decimals}f}' for decimals in (2, 1)] + [f'{value:.0f}.', f'{value:.0f}']:
+        if len(text) <= width:
+            return f'{text:>{width}}'
+
+    raise ValueError(f'Valor {value} não cabe em um campo de {width} caracteres')
+
+
+def record(spec, values):
+    """
+    Método para montagem de um registro de largura fixa de acordo com a especificação do bloco
+    :param spec: especificação das colunas do bloco (ver read_file)
+    :param values: dicionário com os valores dos campos (campos ausentes ficam em branco)
+    :return: Registro do bloco
+    """
+
+    line = [' '] * max(end for _, _, end, _, _ in spec)
+    for name, start, end, kind, _ in spec:
+        if name in values:
+            text = str(values[name]) if kind == 's' else field(values[name], end - start)
+            line[start:end] = text[:end - start].ljust(end - start)
+
+    return ''.join(line).rstrip()
+
+
+def synthetic_pwf(nbus, file_out, seed=0, gen_ratio=0.25, chord_ratio=0.5):
+    """
+    Método para geração de um arquivo de dados elétricos sintético (blocos DBAR, DLIN e DGER)
+
+    As barras são dispostas em uma malha retangular: ramos horizontais e a primeira coluna formam uma árvore geradora,
+    os demais ramos da malha e algumas diagonais são incluídos aleatoriamente. A geração é distribuída ao longo da malha
+    de modo a equilibrar a carga localmente
+    :param nbus: número de barras
+    :param file_out: caminho do arquivo de saída
+    :param seed: semente do gerador de números aleatórios
+    :param gen_ratio: fração das barras com geração
+    :param chord_ratio: probabilidade de inclusão de cada ramo fora da árvore geradora
+    :return: Número de barras, ramos e geradores
+    """
+
+    rng = np.random.default_rng(seed)
+
+    cols = int(np.ceil(np.sqrt(nbus)))
+    idx = np.arange(nbus)
+    row, col = idx // cols, idx % cols
+
+    # Árvore geradora: ramos horizontais e ramos verticais da primeira coluna
+    horizontal = idx[(col < cols - 1) & (idx + 1 < nbus)]
+    vertical = idx[idx + cols < nbus]
+    diagonal = idx[(col < cols - 1) & (idx + cols + 1 < nbus)]
+
+    tree = np.concatenate((np.column_stack((horizontal, horizontal + 1)),
+                           np.column_stack((vertical[col[vertical] == 0], vertical[col[vertical] == 0] + cols))))
+    chords = np.concatenate((np.column_stack((vertical, vertical + cols))[col[vertical] != 0],
+                             np.column_stack((diagonal, diagonal + cols + 1))))
+    chords = chords[rng.random(chords.shape[0]) < chord_ratio]
+    branches = np.concatenate((tree, chords))
+    branches = branches[np.lexsort((branches[:, 1], branches[:, 0]))]
+
+    # Barras de geração (barra 1 -> VTheta) e cargas
+    tipo = np.where(rng.random(nbus) < gen_ratio, 1, 0)
+    tipo[0] = 2
+    gen = np.flatnonzero(tipo != 0)
+
+    p_load = np.round(rng.uniform(5., 60., nbus), 1)
+    q_load = np.round(p_load * rng.uniform(0.1, 0.3, nbus), 1)
+
+    # Geração de cada gerador: carga das barras mais próximas (equilíbrio local)
+    owner = gen[np.clip(np.searchsorted(gen, idx), 0, gen.size - 1)]
+    p_gen = np.round(np.bincount(owner, weights=p_load, minlength=nbus)[gen] * 1.02, 1)
+    pg_max = np.round(p_gen * rng.uniform(1.5, 2.5, gen.size), 0)
+    est = np.round(rng.uniform(2., 6., gen.size), 2)
+
+    # Parâmetros dos ramos (em %): X/R entre 5 e 12 e susceptância proporcional à reatância
+    reat = np.round(rng.uniform(1., 6., branches.shape[0]), 2)
+    resist = np.round(reat / rng.uniform(5., 12., branches.shape[0]), 2)
+    suscep = np.round(reat * rng.uniform(0.2, 1.0, branches.shape[0]), 2)
+
+    with open(file_out, 'w', encoding='latin-1') as f:
+        f.write(f'TITU\nSistema sintetico {nbus} barras\n')
+
+        f.write('DBAR\n')
+        for bus in range(nbus):
+            values = {'num': bus + 1, 'oper': 'L', 'tipo': int(tipo[bus]), 'nome': f'BARRA{bus + 1}',
+                      'tensao': 1020 if tipo[bus] else 1000, 'angulo': 0., 'p_load': p_load[bus],
+                      'q_load': q_load[bus], 'area': 1}
+            if tipo[bus]:
+                values.update(p=p_gen[np.searchsorted(gen, bus)], q=0., q_min=-9999., q_max=9999.)
+            f.write(record(DBAR, values) + '\n')
+        f.write('99999\n')
+
+        f.write('DLIN\n')
+        for (de, para), r, x, b in zip(branches, resist, reat, suscep):
+            f.write(record(DLIN, {'de': int(de) + 1, 'oper': 'L', 'para': int(para) + 1, 'circ': 1, 'resist': r,
+                                  'reat': x, 'suscep': b, 'capac_norm': 500., 'capac_emerg': 600.}) + '\n')
+        f.write('99999\n')
+
+        f.write('DGER\n')
+        for bus, pmax, droop in zip(gen, pg_max, est):
+            f.write(record(DGER, {'num': int(bus) + 1, 'pg_min': 0., 'pg_max': pmax, 'est': droop}) + '\n')
+        f.write('99999\n')
+
+        f.write('FIM\n')
+
+    return nbus, branches.shape[0], gen.size
@@ -0,0 +1,27 @@
+import os
+import unittest
+
+from benchmark import bench_import
+
+# Tempo máximo de importação (em s) dos módulos de cálculo -> ajustável pela variável de ambiente PWF_IMPORT_BUDGET
+BUDGET = float(os.environ.get('PWF_IMPORT_BUDGET', '1.0'))
+
+# Módulos importados pelos processos de cálculo
+MODULES = ('power_flow_gov', 'read_file', 'ybus')
+
+
+class ImportBudgetTest(unittest.TestCase):
+    """
+    Teste do tempo de importação dos módulos de cálculo em um processo novo (sem pandas e plotly)
+    """
+
+    def test_import_budget(self):
+        # Menor tempo de três processos (reduz a influência da carga da máquina), medido por benchmark.bench_import
+        bench = bench_import(MODULES, repeat=3)
+
+        self.assertEqual(bench['loaded'], [], 'módulos de interface carregados na importação')
+        self.assertLess(bench['seconds'], BUDGET, f"importação em {bench['seconds']:.3f} s (limite {BUDGET:.3f} s)")
+
+
+if __name__ == '__main__':
+    unittest.main()
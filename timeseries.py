@@ -0,0 +1,201 @@
+import csv
+
+import numpy as np
+
+from case import bus_index
+from power_flow_gov import PowerFlowControl
+from sink import ResultSink
+
+
+def read_profile(file, dbar):
+    """
+    Método para leitura de um perfil de carga em arquivo CSV (uma linha por passo, lida sob demanda)
+
+    O cabeçalho define o tipo de multiplicador: coluna 'system' (multiplicador único), colunas 'area_<número>'
+    (multiplicador de cada área) ou colunas 'bus_<número>' (multiplicador de cada barra; barras ausentes mantêm a carga
+    base). Colunas 'time' e 'hour' são ignoradas
+    :param file: caminho do arquivo CSV
+    :param dbar: DataFrame do bloco dbar (numeração das barras)
+    :return: Gerador de multiplicadores de carga de cada passo (ver TimeSeries.run)
+    """
+
+    nbus = len(dbar['num'])
+
+    with open(file, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        cols = [idx for idx, name in enumerate(header) if name not in ('time', 'hour')]
+        kind = {header[idx].split('_')[0] for idx in cols}
+        if len(kind) != 1 or not kind <= {'system', 'area', 'bus'}:
+            raise ValueError("Cabeçalho inválido: utilize 'system', 'area_<número>' ou 'bus_<número>'")
+        kind = kind.pop()
+
+        ids = [int(header[idx].split('_')[1]) for idx in cols] if kind != 'system' else None
+        bus = bus_index(dbar['num'], ids) if kind == 'bus' else None
+
+        for line in reader:
+            if not line:
+                continue
+            values = np.array([float(line[idx]) for idx in cols])
+
+            if kind == 'system':
+                yield values[0]
+            elif kind == 'area':
+                yield dict(zip(ids, values))
+            else:
+                mult = np.ones(nbus)
+                mult[bus] = values
+                yield mult
+
+
+class TimeSeries:
+    """
+    Classe para simulação quase estática de séries temporais de carga com Regulação Primária
+
+    O caso compilado, a estrutura da Jacobiana Expandida e a ordenação da fatoração são mantidos entre os passos e cada
+    passo parte da solução do passo anterior. Os resultados são produzidos passo a passo (gerador), de modo que a
+    memória utilizada não depende do comprimento do perfil de carga
+    """
+
+    def __init__(self, dbar, dlin, dger, ybus, vlim=(0.95, 1.05), **kwargs):
+        """
+        :param dbar: DataFrame do bloco dbar
+        :param dlin: DataFrame do bloco dlin
+        :param dger: DataFrame do bloco dger
+        :param ybus: matriz Ybus
+        :param vlim: limites de tensão (em p.u.) para identificação de violações
+        :param kwargs: argumentos adicionais de PowerFlowControl (solver, dishonest, trace)
+        """
+
+        self.dbar = dbar
+        self.dger = dger
+        self.vlim = vlim
+
+        # Caso compilado mantido entre os passos (carga base em p.u.)
+        self.pf = PowerFlowControl(dbar, dlin, dger, ybus, 0., **kwargs)
+        self.p_load = self.pf.case['p_load'].copy()
+        self.q_load = self.pf.case['q_load'].copy()
+        self.area = np.asarray(dbar['area'], dtype=int)
+
+        # Última solução convergida e conjuntos ativos de limites de potência ativa e reativa (partida dos passos
+        # seguintes a uma solução não convergida)
+        self.sol = None
+        self.limit_state = None
+        self.q_state = None
+
+        # Razão entre a carga total do passo e a carga base
+        self.ratio = 1.
+
+    def multiplier(self, step):
+        """
+        Método para cálculo do multiplicador de carga de cada barra
+        :param step: multiplicador único, dicionário {área: multiplicador} ou array com o multiplicador de cada barra
+         (linhas do bloco dbar)
+        :return: Array com o multiplicador de cada barra
+        """
+
+        if isinstance(step, dict):
+            mult = np.ones(self.area.size)
+            for area, value in step.items():
+                mult[self.area == area] = value
+            return mult
+
+        mult = np.asarray(step, dtype=float)
+        if mult.ndim == 0:
+            return np.full(self.area.size, float(mult))
+        if mult.size != self.area.size:
+            raise ValueError(f'Perfil com {mult.size} multiplicadores para {self.area.size} barras')
+
+        return mult
+
+    def step(self, mult):
+        """
+        Método para solução de um passo da série temporal
+        :param mult: multiplicador de carga de cada barra
+        :return: Objeto PowerFlowControl com a solução do passo
+        """
+
+        pf = self.pf
+
+        # Fator de carregamento do sistema (variação de carga total) e carga de cada barra relativa a ele. Carga base
+        # ou carga escalada nula (ex.: multiplicadores nulos): fator unitário e cargas escaladas diretamente
+        total = np.sum(self.p_load)
+        scaled = np.sum(self.p_load * mult)
+        self.ratio = scaled / total if total else 1.
+        pf.delta = self.ratio if self.ratio else 1.
+        pf.case['p_load'] = self.p_load * mult / pf.delta
+        pf.case['q_load'] = self.q_load * mult / pf.delta
+
+        # Partida a quente: solução e conjuntos ativos do passo anterior (ou da última solução convergida)
+        if self.sol is not None and not pf.converged:
+            pf.sol = {key: np.copy(value) for key, value in self.sol.items()}
+            pf.sol['f'] = float(self.sol['f'])
+            pf.limit_state = self.limit_state.copy()
+            pf.q_state = self.q_state.copy()
+
+        pf.iter = 0
+        pf.history = list()
+        pf.limit_events = list()
+        pf.q_switches = np.zeros(pf.nger, dtype=int)
+
+        try:
+            pf.newton_control(imprime=False)
+        except RuntimeError:
+            # Jacobiana singular
+            pf.converged = False
+
+        if pf.converged:
+            if self.sol is None:
+                self.sol = {key: np.copy(value) for key, value in pf.sol.items()}
+            else:
+                for key in ('voltage', 'theta', 'pg', 'qg'):
+                    self.sol[key][:] = pf.sol[key]
+                self.sol['f'] = pf.sol['f']
+            self.limit_state = pf.limit_state.copy()
+            self.q_state = pf.q_state.copy()
+
+        return pf
+
+    def run(self, profile, folder=None):
+        """
+        Método para simulação da série temporal
+        :param profile: iterável com o multiplicador de carga de cada passo (ver multiplier e read_profile)
+        :param folder: diretório para gravação dos resultados completos (ver sink.ResultSink) -> Default: não grava
+        :return: Gerador de dicionários com frequência, despacho, tensões, carregamento e violações de cada passo
+        """
+
+        sink = ResultSink(folder, prefix='series') if folder else None
+
+        try:
+            for idx, step in enumerate(profile):
+                pf = self.step(self.multiplier(step))
+
+                if sink is not None:
+                    sink.append(pf, run=idx)
+
+                voltage = pf.sol['voltage']
+                loading = pf.flow()['loading']
+                viol = (voltage < self.vlim[0]) | (voltage > self.vlim[1])
+                over = np.flatnonzero(loading > 100.)
+
+                yield {
+                    'step': idx,
+                    'deltaLoad': (self.ratio - 1) * 1e2,
+                    'converged': pf.converged,
+                    'iter': pf.iter,
+                    'outer': pf.outer,
+                    'f': pf.sol['f'] * pf.fbase,
+                    'pg': pf.sol['pg'] * pf.sbase,
+                    'qg': pf.sol['qg'] * pf.sbase,
+                    'v_min': np.min(voltage),
+                    'v_max': np.max(voltage),
+                    'n_viol': int(np.sum(viol)),
+                    'bus_viol': np.asarray(self.dbar['num'])[viol],
+                    'loading_max': np.max(loading),
+                    'n_overload': over.size,
+                    'branch_overload': over,
+                    'limit_events': pf.limit_events
+                }
+        finally:
+            if sink is not None:
+                sink.close()
@@ -0,0 +1,73 @@
+import json
+import time
+from collections import deque
+
+
+class Trace:
+    """
+    Classe para registro das iterações do fluxo de potência em formato JSON lines
+
+    Cada evento ('start', 'iteration', 'limit' e 'end') é um dicionário gravado em uma linha do arquivo e repassado
+    às funções de callback. Sem arquivo de saída, os eventos mais recentes (até max_records) são mantidos em memória
+    (records), de modo que o registro pode permanecer ativo em processos de longa duração. Com max_records=None, os
+    eventos são apenas repassados às funções de callback (records = None)
+    """
+
+    def __init__(self, file=None, callbacks=(), max_records=100000):
+        """
+        :param file: caminho (gravação em modo append) ou objeto de arquivo de saída -> Default: eventos em memória
+        :param callbacks: funções chamadas com o dicionário de cada evento
+        :param max_records: número máximo de eventos mantidos em memória sem arquivo de saída (os mais antigos são
+         descartados; None -> nenhum evento em memória, somente com callbacks)
+        """
+
+        if file is None and max_records is None and not callbacks:
+            raise ValueError('Registro sem destino: informe max_records, um arquivo de saída ou callbacks')
+
+        self.callbacks = list(callbacks)
+        self.records = deque(maxlen=max_records) if file is None and max_records is not None else None
+
+        # Arquivo de saída (fechado em close apenas se aberto pela própria classe)
+        self.own = isinstance(file, str)
+        self.file = open(file, 'a', encoding='utf-8') if self.own else file
+
+        # Contador de soluções registradas
+        self.run = 0
+
+    def emit(self, event, **data):
+        """
+        Método para registro de um evento
+        :param event: tipo do evento
+        :param data: campos do evento (valores serializáveis em JSON)
+        :return: Evento gravado e repassado às funções de callback
+        """
+
+        if event == 'start':
+            self.run += 1
+
+        record = {'event': event, 'run': self.run, 'time': time.time(), **data}
+
+        if self.file is not None:
+            self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+            if event == 'end':
+                self.file.flush()
+        elif self.records is not None:
+            self.records.append(record)
+
+        for callback in self.callbacks:
+            callback(record)
+
+    def close(self):
+        """
+        Método para encerramento do registro
+        :return: Arquivo de saída fechado
+        """
+
+        if self.own and not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,224 @@
+import glob
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from case import Block
+from power_flow_gov import PowerFlowControl
+
+# Variáveis da solução armazenadas
+KEYS = ('voltage', 'theta', 'pg', 'qg', 'f')
+
+
+def fingerprint(dbar, dlin, dger):
+    """
+    Método para cálculo da identificação do caso (hash dos campos numéricos: os metadados de texto não alteram a
+    solução e não são decodificados)
+    :param dbar: DataFrame (ou Block) do bloco dbar
+    :param dlin: DataFrame (ou Block) do bloco dlin
+    :param dger: DataFrame (ou Block) do bloco dger
+    :return: Hash do conteúdo dos blocos
+    """
+
+    h = hashlib.sha256()
+    for block in (dbar, dlin, dger):
+        for name in block:
+            values = np.asarray(block.raw(name) if isinstance(block, Block) else block[name])
+            if values.dtype.kind not in 'biuf':
+                continue
+            h.update(name.encode())
+            h.update(np.ascontiguousarray(values).tobytes())
+
+    return h.hexdigest()[:32]
+
+
+class WarmStartStore:
+    """
+    Classe para armazenamento de soluções convergidas utilizadas como solução inicial de novos casos (partida a quente)
+
+    Cada solução é identificada pelo caso (ver fingerprint) e pelos parâmetros do ponto de operação (variação de carga
+    ou vetor de parâmetros). Um novo caso parte da solução armazenada mais próxima ou da interpolação linear entre as
+    duas soluções mais próximas, quando o ponto de operação está entre elas. As soluções menos usadas recentemente são
+    removidas quando o número de soluções ultrapassa capacity. Opcionalmente, as soluções são gravadas em disco (um
+    arquivo .npz por solução) e carregadas na criação do objeto
+    """
+
+    def __init__(self, capacity=256, folder=None, interpolate=True, radius=None):
+        """
+        :param capacity: número máximo de soluções armazenadas
+        :param folder: diretório para gravação das soluções -> Default: somente em memória
+        :param interpolate: Recebe True (interpola entre as duas soluções mais próximas) ou False
+        :param radius: distância máxima entre pontos de operação para uso de uma solução -> Default: sem limite
+        """
+
+        self.capacity = capacity
+        self.folder = folder
+        self.interpolate = interpolate
+        self.radius = radius
+
+        # Soluções em ordem de uso (a menos usada recentemente primeiro)
+        self.entries = OrderedDict()
+
+        # Estatísticas de acesso
+        self.hits = 0
+        self.misses = 0
+        self.interpolations = 0
+        self.evictions = 0
+
+        if folder is not None:
+            os.makedirs(folder, exist_ok=True)
+            self.restore()
+
+    @staticmethod
+    def point(params):
+        """
+        Método para conversão dos parâmetros do ponto de operação
+        :param params: variação de carga (em %) ou vetor de parâmetros
+        :return: Tupla de parâmetros
+        """
+
+        return tuple(float(value) for value in np.atleast_1d(np.asarray(params, dtype=float)))
+
+    def path(self, key):
+        """
+        Método para cálculo do arquivo de uma solução (hash do caso e dos parâmetros: a identificação do caso pode
+        conter caracteres inválidos em nomes de arquivo e é gravada no conteúdo do arquivo)
+        :param key: tupla (caso, parâmetros)
+        :return: Caminho do arquivo no diretório de gravação
+        """
+
+        h = hashlib.sha1(str(key[0]).encode() + b'\0')
+        h.update(np.array(key[1]).tobytes())
+
+        return os.path.join(self.folder, f'{h.hexdigest()[:24]}.npz')
+
+    def restore(self):
+        """
+        Método para carregamento das soluções gravadas (as usadas mais recentemente, até capacity soluções)
+        :return: Soluções gravadas em self.entries
+        """
+
+        files = sorted(glob.glob(os.path.join(self.folder, '*.npz')), key=os.path.getmtime)
+        for file in files[-self.capacity:]:
+            try:
+                with np.load(file) as data:
+                    key = (str(data['case']), tuple(data['params'].tolist()))
+                    self.entries[key] = {name: data[name].copy() for name in KEYS}
+            except (OSError, ValueError, KeyError):
+                # Arquivo incompleto ou corrompido
+                continue
+            self.entries[key]['f'] = float(self.entries[key]['f'])
+
+    def put(self, case, params, sol):
+        """
+        Método para armazenamento de uma solução convergida
+        :param case: identificação do caso (ver fingerprint)
+        :param params: variação de carga (em %) ou vetor de parâmetros do ponto de operação
+        :param sol: dicionário da solução (PowerFlowControl.sol)
+        :return: Solução armazenada (e gravada, se houver diretório de gravação)
+        """
+
+        key = (case, self.point(params))
+        self.entries[key] = {name: np.copy(sol[name]) for name in KEYS}
+        self.entries[key]['f'] = float(sol['f'])
+        self.entries.move_to_end(key)
+
+        if self.folder is not None:
+            # Grava em arquivo temporário e renomeia (leitura simultânea de outros processos)
+            path = self.path(key)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                np.savez(f, case=np.array(str(key[0])), params=np.array(key[1]), **self.entries[key])
+            os.replace(tmp, path)
+
+        while len(self.entries) > self.capacity:
+            old, _ = self.entries.popitem(last=False)
+            self.evictions += 1
+            if self.folder is not None:
+                try:
+                    os.remove(self.path(old))
+                except OSError:
+                    pass
+
+    def get(self, case, params):
+        """
+        Método para busca da solução inicial de um ponto de operação
+        :param case: identificação do caso (ver fingerprint)
+        :param params: variação de carga (em %) ou vetor de parâmetros do ponto de operação
+        :return: Dicionário da solução inicial (None se não houver solução armazenada do caso)
+        """
+
+        x = np.array(self.point(params))
+        keys = [key for key in self.entries if key[0] == case and len(key[1]) == x.size]
+
+        dist = np.array([np.linalg.norm(np.array(key[1]) - x) for key in keys])
+        if self.radius is not None:
+            keys = [key for key, d in zip(keys, dist) if d <= self.radius]
+            dist = dist[dist <= self.radius]
+
+        if not keys:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        order = np.argsort(dist)
+        near = keys[order[0]]
+        self.entries.move_to_end(near)
+        if self.folder is not None and os.path.isfile(self.path(near)):
+            os.utime(self.path(near))
+
+        sol = {name: np.copy(value) for name, value in self.entries[near].items()}
+
+        # Interpolação entre as duas soluções mais próximas: projeção do ponto no segmento entre elas
+        if self.interpolate and dist[order[0]] > 0 and len(keys) > 1:
+            other = keys[order[1]]
+            a, b = np.array(near[1]), np.array(other[1])
+            t = np.dot(x - a, b - a) / np.dot(b - a, b - a)
+            if 0 < t < 1:
+                self.interpolations += 1
+                self.entries.move_to_end(other)
+                sol = {name: (1 - t) * value + t * self.entries[other][name] for name, value in sol.items()}
+
+        return sol
+
+    def stats(self):
+        """
+        Método para consulta das estatísticas de acesso
+        :return: Dicionário com acertos, falhas, taxa de acerto, interpolações, remoções e número de soluções
+        """
+
+        total = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.,
+            'interpolations': self.interpolations,
+            'evictions': self.evictions,
+            'size': len(self.entries)
+        }
+
+    def solve(self, dbar, dlin, dger, ybus, delta, case=None, **kwargs):
+        """
+        Método para solução do fluxo de potência com Regulação Primária a partir da solução armazenada mais próxima
+        :param dbar: DataFrame do bloco dbar
+        :param dlin: DataFrame do bloco dlin
+        :param dger: DataFrame do bloco dger
+        :param ybus: matriz Ybus
+        :param delta: variação de carga (em %)
+        :param case: identificação do caso -> Default: calculada a partir dos blocos (ver fingerprint)
+        :param kwargs: argumentos adicionais de PowerFlowControl
+        :return: Objeto PowerFlowControl após newton_control (solução convergida armazenada)
+        """
+
+        case = fingerprint(dbar, dlin, dger) if case is None else case
+
+        pf = PowerFlowControl(dbar, dlin, dger, ybus, delta, sol=self.get(case, delta), **kwargs)
+        pf.newton_control(imprime=False)
+
+        if pf.converged:
+            self.put(case, delta, pf.sol)
+
+        return pf
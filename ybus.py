@@ -1,6 +1,9 @@
-from numpy import ndarray
+from collections import deque
+
 import numpy as np
-import pandas as pd
+import scipy.sparse as sp
+
+from case import bus_index
 
 
 class Ybus:
@@ -16,71 +19,308 @@ class Ybus:
         # Potência base do sistema (em MVA)
         self.sbase = 100
 
-        # Número de barras do sistema
-        self.nbus = int(self.dbar.max()['num'])
+        # Número de barras do sistema (índices internos contíguos: linha da barra no bloco dbar)
+        self.nbus = len(self.dbar['num'])
+
+        # Índices internos das barras de e para de cada ramo
+        self.de = bus_index(self.dbar['num'], self.dlin['de'])
+        self.para = bus_index(self.dbar['num'], self.dlin['para'])
+
+    def branch(self, resist=True, shunt=True, tap=True, idx=slice(None)):
+        """
+        Método para cálculo dos elementos do modelo pi de cada linha de transmissão e transformador
+        :param resist: Recebe True (considera a resistência série) ou False -> Default: True
+        :param shunt: Recebe True (considera o carregamento da linha) ou False -> Default: True
+        :param tap: Recebe True (considera o tap dos transformadores) ou False -> Default: True
+        :param idx: ramos (linhas do bloco dlin) -> Default: todos
+        :return: Barras de e para (índices) e elementos yff, yft, ytf e ytt de cada ramo
+        """
+
+        def column(name, dtype=float):
+            return np.asarray(self.dlin[name], dtype=dtype)[idx]
+
+        # Admitância série, tap e carregamento da linha
+        r = column('resist') if resist else 0.
+        ys = self.sbase / (r + 1j * column('reat'))
+        a = column('tap') if tap else 1.
+        ysh = 1j * column('suscep') / (2 * self.sbase) if shunt else 0.
+
+        return self.de[idx], self.para[idx], ys / a ** 2 + ysh, -ys / a, -ys / a, ys + ysh
+
+    def assemble(self, branch, shunt=True):
+        """
+        Método para montagem da matriz de admitâncias nodais a partir dos elementos dos ramos
+        :param branch: barras de e para e elementos yff, yft, ytf e ytt de cada ramo (ver branch)
+        :param shunt: Recebe True (considera os bancos de capacitores e reatores) ou False -> Default: True
+        :return: Matriz esparsa (CSR)
+        """
+
+        de, para, yff, yft, ytf, ytt = branch
+
+        # Bancos de capacitores e reatores
+        num = np.arange(self.nbus)
+        ybar = 1j * np.asarray(self.dbar['capac_reat'], dtype=float) / self.sbase if shunt else np.zeros(num.size)
+
+        # Montagem em formato COO (elementos repetidos são somados na conversão para CSR)
+        row = np.concatenate((de, para, de, para, num))
+        col = np.concatenate((para, de, de, para, num))
+        data = np.concatenate((yft, ytf, yff, ytt, ybar))
+
+        return sp.coo_matrix((data, (row, col)), shape=(self.nbus, self.nbus)).tocsr()
+
+    def calc_b(self, resist=True, shunt=True, tap=True):
+        """
+        Método para cálculo da matriz de susceptâncias (-Im(Ybus)) com as simplificações do método desacoplado rápido
+        :param resist: Recebe True (considera a resistência série) ou False -> Default: True
+        :param shunt: Recebe True (considera os elementos em derivação) ou False -> Default: True
+        :param tap: Recebe True (considera o tap dos transformadores) ou False -> Default: True
+        :return: Matriz B esparsa (CSR)
+        """
 
-        # Inicializa matriz Ybus
-        self.ybus: ndarray = np.zeros(shape=[self.nbus, self.nbus], dtype='complex_')
+        return -self.assemble(self.branch(resist, shunt, tap), shunt).imag
 
-    def calc_ybus(self, file_out=False):
+    def calc_ybus(self, file_out=False, dense=False, fmt='npz'):
         """
         Método para cálculo dos parâmetros da matriz Ybus
-        :param file_out: caminho do arquivo de saída -> .csv contendo a matriz Ybus
+        :param file_out: prefixo do arquivo de saída -> ybus.npz ou ybus.csv contendo a matriz Ybus esparsa
+        :param dense: Recebe False (matriz esparsa CSR) ou True (matriz densa) -> Default: False
+        :param fmt: formato do arquivo de saída: 'npz' (scipy.sparse) ou 'csv' (barra de, barra para, g, b por elemento
+         não nulo) -> Default: 'npz'
         :return: Matriz Ybus
         """
 
-        # Data conversion
-        self.dlin['de'] = self.dlin.de.astype(dtype='int', copy=False)
-        self.dlin['para'] = self.dlin.para.astype(dtype='int', copy=False)
-        self.dbar['num'] = self.dbar.num.astype(dtype='int', copy=False)
-
-        # Linhas de transmissão e transformadores
-        for idx, value in self.dlin.iterrows():
-
-            # Elementos fora da diagonal (elemento série)
-            if value['tap'].strip() == '':
-                self.ybus[value['de'] - 1, value['para'] - 1] -= (1 / complex(real=value['resist'],
-                                                                              imag=value['reat'])) * self.sbase
-                self.ybus[value['para'] - 1, value['de'] - 1] -= (1 / complex(real=value['resist'],
-                                                                              imag=value['reat'])) * self.sbase
-            else:
-                self.ybus[value['de'] - 1, value['para'] - 1] -= (1 / complex(real=value['resist'],
-                                                                              imag=value['reat'])) * self.sbase \
-                                                                 / float(value['tap'])
-                self.ybus[value['para'] - 1, value['de'] - 1] -= (1 / complex(real=value['resist'],
-                                                                              imag=value['reat'])) * self.sbase \
-                                                                 / float(value['tap'])
-
-            # Elementos na diagonal (elemento série)
-            if value['tap'].strip() == '':
-                self.ybus[value['de'] - 1, value['de'] - 1] += (1 / complex(real=value['resist'], imag=value['reat'])) \
-                                                               * self.sbase
-            else:
-                self.ybus[value['de'] - 1, value['de'] - 1] += (1 / complex(real=value['resist'], imag=value['reat'])) \
-                                                               * self.sbase / float(value['tap']) ** 2
-
-            self.ybus[value['para'] - 1, value['para'] - 1] += (1 / complex(real=value['resist'], imag=value['reat'])) \
-                                                               * self.sbase
-
-            # Elementos na diagonal (elemento shunt)
-            if value['suscep'].strip() == '':
-                pass
-            else:
-                self.ybus[value['de'] - 1, value['de'] - 1] += complex(real=0., imag=float(value['suscep'])
-                                                                                     / (2 * self.sbase))
-
-                self.ybus[value['para'] - 1, value['para'] - 1] += complex(real=0., imag=float(value['suscep'])
-                                                                                         / (2 * self.sbase))
-        # Bancos de capacitores e reatores
-        for idx, value in self.dbar.iterrows():
-            # Elementos na diagonal (elemento shunt)
-            if value['capac_reat'].strip() == '':
-                pass
-            else:
-                self.ybus[value['num'] - 1, value['num'] - 1] += complex(real=0., imag=float(value['capac_reat'])
-                                                                                       / self.sbase)
+        # Linhas de transmissão, transformadores e bancos de capacitores e reatores
+        self.ybus = self.assemble(self.branch())
 
         if file_out:
-            pd.DataFrame(self.ybus).to_csv(f'{file_out}ybus.csv', header=None, index=None, sep=',')
+            self.export(self.ybus, f'{file_out}ybus.{fmt}', fmt, num=self.dbar['num'])
+
+        if dense:
+            self.ybus = self.ybus.toarray()
 
         return self.ybus
+
+    @staticmethod
+    def export(ybus, file, fmt='npz', num=None):
+        """
+        Método para gravação da matriz Ybus em formato esparso
+        :param ybus: matriz Ybus esparsa
+        :param file: caminho do arquivo de saída
+        :param fmt: 'npz' (scipy.sparse.save_npz) ou 'csv' (barra de, barra para, g, b por elemento não nulo)
+        :param num: números das barras (linhas do bloco dbar) para o formato csv -> Default: índices a partir de 1
+        :return: Arquivo gravado
+        """
+
+        if fmt == 'npz':
+            sp.save_npz(file, sp.csr_matrix(ybus))
+        elif fmt == 'csv':
+            coo = sp.coo_matrix(ybus)
+            num = np.arange(1, coo.shape[0] + 1) if num is None else np.asarray(num, dtype=int)
+            np.savetxt(file, np.column_stack((num[coo.row], num[coo.col], coo.data.real, coo.data.imag)),
+                       fmt=('%d', '%d', '%.10g', '%.10g'), delimiter=',', header='de,para,g,b', comments='')
+        else:
+            raise ValueError(f"Formato {fmt!r} inválido: utilize 'npz' ou 'csv'")
+
+
+class MutableYbus(Ybus):
+    """
+    Classe para alteração incremental da matriz Ybus (tap, resistência, reatância e carregamento dos ramos, estado dos
+    ramos e bancos de capacitores e reatores das barras)
+
+    Os parâmetros são copiados dos blocos dbar e dlin (os DataFrames não são alterados). A estrutura esparsa da matriz é
+    mantida fixa (ramos desligados permanecem com elementos nulos) e cada alteração soma a diferença dos elementos do
+    ramo ou da barra nas posições correspondentes do vetor de dados da matriz CSR. As alterações são registradas em um
+    histórico, utilizado para reverter alterações e para identificação das barras alteradas pelas estruturas que
+    dependem da Ybus (fatoração, Jacobiana, caso armazenado)
+    """
+
+    # Parâmetros alteráveis dos ramos e das barras
+    BRANCH = ('resist', 'reat', 'suscep', 'tap', 'status')
+    BUS = ('capac_reat',)
+
+    def __init__(self, dbar, dlin, journal_max=10000):
+        """
+        :param dbar: DataFrame (ou dicionário de arrays) do bloco dbar
+        :param dlin: DataFrame (ou dicionário de arrays) do bloco dlin
+        :param journal_max: número máximo de alterações mantidas no histórico
+        """
+
+        super().__init__({name: np.array(dbar[name], dtype=float) for name in ('num',) + self.BUS},
+                         {name: np.array(dlin[name], dtype=float) for name in ('de', 'para') + self.BRANCH[:-1]})
+
+        # Estado de cada ramo (1: ligado, 0: desligado)
+        self.dlin['status'] = np.ones(self.dlin['de'].size)
+
+        self.ybus = self.calc_ybus()
+        self.ybus.sort_indices()
+
+        # Modelo pi de cada ramo (atualizado a cada alteração) e posição dos elementos de cada ramo e de cada barra no
+        # vetor de dados da Ybus
+        self.pi = self.branch()
+        self.de, self.para = self.pi[0], self.pi[1]
+        self.bus = np.arange(self.nbus)
+
+        self.pos = np.column_stack([self.position(row, col) for row, col in
+                                    ((self.de, self.de), (self.de, self.para), (self.para, self.de),
+                                     (self.para, self.para))])
+        self.pos_bus = self.position(self.bus, self.bus)
+
+        # Versão da matriz, histórico de alterações e alterações aplicadas (revertidas em ordem inversa)
+        self.version = 0
+        self.journal = deque(maxlen=journal_max)
+        self.applied = list()
+
+    def branch(self, resist=True, shunt=True, tap=True, idx=slice(None)):
+        """
+        Método para cálculo dos elementos do modelo pi de cada ramo (elementos nulos nos ramos desligados)
+        :param resist: Recebe True (considera a resistência série) ou False -> Default: True
+        :param shunt: Recebe True (considera o carregamento da linha) ou False -> Default: True
+        :param tap: Recebe True (considera o tap dos transformadores) ou False -> Default: True
+        :param idx: ramos (linhas do bloco dlin) -> Default: todos
+        :return: Barras de e para (índices) e elementos yff, yft, ytf e ytt de cada ramo
+        """
+
+        de, para, *y = super().branch(resist, shunt, tap, idx)
+        status = self.dlin['status'][idx]
+
+        return (de, para) + tuple(value * status for value in y)
+
+    def position(self, row, col):
+        """
+        Método para localização de elementos no vetor de dados da Ybus (índices ordenados)
+        :param row: linhas dos elementos
+        :param col: colunas dos elementos
+        :return: Posição de cada elemento em ybus.data
+        """
+
+        rows = np.repeat(np.arange(self.nbus), np.diff(self.ybus.indptr))
+        key = rows.astype(np.int64) * self.nbus + self.ybus.indices
+
+        return np.searchsorted(key, np.asarray(row, dtype=np.int64) * self.nbus + col)
+
+    def update(self, name, index, value):
+        """
+        Método para alteração de um parâmetro de um ramo ou de uma barra
+        :param name: parâmetro ('resist', 'reat', 'suscep', 'tap', 'status' ou 'capac_reat')
+        :param index: ramo (linha do bloco dlin) ou barra (linha do bloco dbar)
+        :param value: novo valor do parâmetro
+        :return: Registro da alteração
+        """
+
+        if name in self.BUS:
+            old = float(self.dbar[name][index])
+            self.dbar[name][index] = value
+            self.ybus.data[self.pos_bus[index]] += 1j * (value - old) / self.sbase
+            buses = [int(self.bus[index])]
+        elif name in self.BRANCH:
+            old = float(self.dlin[name][index])
+            self.dlin[name][index] = value
+
+            # Novos elementos do ramo: soma a diferença na Ybus e atualiza o modelo pi
+            _, _, *stamp = self.branch(idx=[index])
+            for col, y in enumerate(stamp):
+                self.ybus.data[self.pos[index, col]] += y[0] - self.pi[col + 2][index]
+                self.pi[col + 2][index] = y[0]
+            buses = [int(self.de[index]), int(self.para[index])]
+        else:
+            raise ValueError(f'Parâmetro {name!r} não pode ser alterado')
+
+        self.version += 1
+        entry = {'version': self.version, 'name': name, 'index': int(index), 'old': old, 'new': float(value),
+                 'buses': buses}
+        self.journal.append(entry)
+
+        return entry
+
+    def apply(self, name, index, value):
+        """
+        Método para aplicação de uma alteração (registrada para reversão)
+        :param name: parâmetro ('resist', 'reat', 'suscep', 'tap', 'status' ou 'capac_reat')
+        :param index: ramo (linha do bloco dlin) ou barra (linha do bloco dbar)
+        :param value: novo valor do parâmetro
+        :return: Registro da alteração
+        """
+
+        entry = self.update(name, index, value)
+        self.applied.append(entry)
+
+        return entry
+
+    def set_tap(self, branch, tap):
+        """
+        Método para alteração do tap de um transformador
+        :param branch: ramo (linha do bloco dlin)
+        :param tap: novo tap (em p.u.)
+        :return: Registro da alteração
+        """
+
+        return self.apply('tap', branch, tap)
+
+    def switch(self, branch, status):
+        """
+        Método para ligação ou desligamento de um ramo
+        :param branch: ramo (linha do bloco dlin)
+        :param status: Recebe True (ligado) ou False (desligado)
+        :return: Registro da alteração
+        """
+
+        return self.apply('status', branch, float(bool(status)))
+
+    def set_shunt(self, num, capac_reat):
+        """
+        Método para alteração do banco de capacitores e reatores de uma barra
+        :param num: número da barra
+        :param capac_reat: nova potência reativa do banco (em Mvar)
+        :return: Registro da alteração
+        """
+
+        return self.apply('capac_reat', int(bus_index(self.dbar['num'], num)), capac_reat)
+
+    def checkpoint(self):
+        """
+        Método para marcação do estado atual (ver revert)
+        :return: Número de alterações aplicadas
+        """
+
+        return len(self.applied)
+
+    def revert(self, mark=None):
+        """
+        Método para reversão das alterações aplicadas (em ordem inversa)
+        :param mark: estado a ser restaurado (ver checkpoint) -> Default: reverte a última alteração
+        :return: Registros das reversões (também incluídos no histórico)
+        """
+
+        mark = len(self.applied) - 1 if mark is None else mark
+
+        entries = list()
+        while len(self.applied) > max(mark, 0):
+            entry = self.applied.pop()
+            entries.append(self.update(entry['name'], entry['index'], entry['old']))
+
+        return entries
+
+    def changes(self, since=0):
+        """
+        Método para consulta das alterações posteriores a uma versão da matriz
+        :param since: versão de referência
+        :return: Lista de registros (None se o histórico não contém todas as alterações: reconstrução necessária)
+        """
+
+        if self.version > since and (not self.journal or self.journal[0]['version'] > since + 1):
+            return None
+
+        return [entry for entry in self.journal if entry['version'] > since]
+
+    def changed_buses(self, since=0):
+        """
+        Método para identificação das barras alteradas após uma versão da matriz
+        :param since: versão de referência
+        :return: Array com os índices das barras alteradas (None se for necessária a reconstrução)
+        """
+
+        entries = self.changes(since)
+        if entries is None:
+            return None
+
+        return np.unique([bus for entry in entries for bus in entry['buses']]).astype(int)